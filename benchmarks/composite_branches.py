@@ -0,0 +1,77 @@
+"""
+Benchmark `LogicTree.composite_branches` against filtering the full product of branch sets.
+
+Each correlated pair of branch sets behaves like HIK x PUY in NSHM_v1.0.4: every branch of the first set is
+correlated with one branch of the second, so all but 1/n of the product is invalid.
+
+Usage:
+    python benchmarks/composite_branches.py
+"""
+
+import timeit
+from functools import reduce
+from operator import mul
+
+from nzshm_model.logic_tree import Correlation, GMCMBranch, GMCMBranchSet, GMCMLogicTree, LogicTreeCorrelations
+
+N_BRANCHES = 3
+
+
+def build_logic_tree(n_pairs: int) -> GMCMLogicTree:
+    weight = 1.0 / N_BRANCHES
+    branch_sets = [
+        GMCMBranchSet(short_name="BASE", branches=[GMCMBranch(branch_id=str(i), weight=0.25) for i in range(4)])
+    ]
+    correlations = []
+    for pair in range(n_pairs):
+        primary = [GMCMBranch(branch_id=f"P{pair}:{i}", weight=weight) for i in range(N_BRANCHES)]
+        secondary = [GMCMBranch(branch_id=f"S{pair}:{i}", weight=weight) for i in range(N_BRANCHES)]
+        branch_sets.append(GMCMBranchSet(short_name=f"P{pair}", branches=primary))
+        branch_sets.append(GMCMBranchSet(short_name=f"S{pair}", branches=secondary))
+        correlations += [
+            Correlation(primary_branch=p, associated_branches=[s]) for p, s in zip(primary, secondary, strict=True)
+        ]
+    return GMCMLogicTree(branch_sets=branch_sets, correlations=LogicTreeCorrelations(correlations))
+
+
+def filtered_product(logic_tree: GMCMLogicTree) -> int:
+    """the approach replaced by CompositeSpace: visit every combination and drop those breaking a correlation."""
+    count = 0
+    for composite_branch in logic_tree._composite_branches():
+        correlation_match = [
+            branch in composite_branch.branches for branch in logic_tree.correlations.primary_branches()
+        ]
+        if any(correlation_match):
+            correlation = logic_tree.correlations[correlation_match.index(True)]
+            if not all(branch in composite_branch.branches for branch in correlation.all_branches):
+                continue
+            weights = [correlation.weight] + [
+                branch.weight for branch in composite_branch.branches if branch not in correlation.all_branches
+            ]
+            composite_branch.weight = reduce(mul, weights, 1.0)
+        count += 1
+    return count
+
+
+def timed(func, *args) -> float:
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=3))
+
+
+def main():
+    print(f"{'pairs':>5} {'product':>8} {'valid':>6} {'filtered (s)':>13} {'constrained (s)':>16} {'speedup':>8}")
+    for n_pairs in range(1, 5):
+        logic_tree = build_logic_tree(n_pairs)
+        n_valid = sum(1 for _ in logic_tree.composite_branches)
+        assert n_valid == filtered_product(logic_tree)
+
+        n_product = 4 * N_BRANCHES ** (2 * n_pairs)
+        t_filtered = timed(filtered_product, logic_tree)
+        t_constrained = timed(lambda tree: list(tree.composite_branches), logic_tree)
+        print(
+            f"{n_pairs:>5} {n_product:>8} {n_valid:>6} {t_filtered:>13.4f} {t_constrained:>16.4f} "
+            f"{t_filtered / t_constrained:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark loading logic trees from JSON with the compiled loaders against `dacite.from_dict`.
+
+`from_dict` times building the logic tree from decoded data; `from_json` also times decoding the file (with `orjson`
+when it is installed) and adding the correlations.
+
+Usage:
+    python benchmarks/json_loading.py
+"""
+
+import importlib.resources as resources
+import json
+import timeit
+from unittest.mock import patch
+
+import dacite
+
+import nzshm_model.logic_tree.loader as loader
+from nzshm_model.logic_tree import GMCMLogicTree, SourceLogicTree
+from nzshm_model.logic_tree.logic_tree_base import LogicTree
+
+RESOURCES = [
+    (SourceLogicTree, 'SRM_JSON/nshm_v1.0.4_v2.json'),
+    (GMCMLogicTree, 'GMM_JSON/gmcm_nshm_v1.0.4.json'),
+]
+
+
+def dacite_from_dict(cls, data):
+    """the loader replaced by the compiled loaders."""
+    return dacite.from_dict(data_class=cls, data=data, config=dacite.Config(strict=True, cast=[tuple]))
+
+
+def dacite_from_json(cls, json_path):
+    """`from_json` as it was: decoded with `json` and built with dacite."""
+    with patch.object(LogicTree, '_from_dict', classmethod(dacite_from_dict)):
+        with open(json_path) as jsonfile:
+            return cls.from_dict(json.load(jsonfile))
+
+
+def timed(func, *args) -> float:
+    return min(timeit.repeat(lambda: func(*args), number=10, repeat=5)) / 10
+
+
+def main():
+    print(f"JSON decoder: {'orjson' if loader.orjson is not None else 'json'}")
+    print(f"{'resource':<32} {'step':<10} {'dacite (ms)':>12} {'compiled (ms)':>14} {'speedup':>8}")
+    for cls, resource in RESOURCES:
+        json_path = resources.files('nzshm_model.resources') / resource
+        data = json.loads(json_path.read_text())
+        data.pop('correlations', None)
+        assert loader.from_dict(cls, data) == dacite_from_dict(cls, data)
+        assert cls.from_json(json_path) == dacite_from_json(cls, json_path)
+
+        for step, t_dacite, t_compiled in [
+            ('from_dict', timed(dacite_from_dict, cls, data), timed(loader.from_dict, cls, data)),
+            ('from_json', timed(dacite_from_json, cls, json_path), timed(cls.from_json, json_path)),
+        ]:
+            print(
+                f"{resource:<32} {step:<10} {t_dacite * 1e3:>12.2f} {t_compiled * 1e3:>14.2f} "
+                f"{t_dacite / t_compiled:>7.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
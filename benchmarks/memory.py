@@ -0,0 +1,66 @@
+"""
+Benchmark the memory used by a loaded model and by expanded realizations.
+
+Memory is measured with tracemalloc, so it counts the Python objects allocated by each step.
+
+Usage:
+    python benchmarks/memory.py
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import nzshm_model
+
+VERSION = "NSHM_v1.0.4"
+N_REALIZATIONS = 100_000
+
+
+def allocated(func) -> tuple[object, int]:
+    """the result of func and the memory it allocated and kept, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def instance_size(obj: object) -> int:
+    """the size of an object and its instance dict (if any), excluding the attribute values."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    model, model_size = allocated(lambda: nzshm_model.get_model_version(VERSION))
+    n_branches = sum(len(branch_set.branches) for branch_set in model.source_logic_tree.branch_sets) + sum(
+        len(branch_set.branches) for branch_set in model.gmm_logic_tree.branch_sets
+    )
+    print(f"model {VERSION}: {model_size / 1e6:.2f} MB ({n_branches} branches)")
+
+    source_branch = model.source_logic_tree.branch_sets[0].branches[0]
+    gmcm_branch = model.gmm_logic_tree.branch_sets[0].branches[0]
+    examples = [
+        source_branch,
+        gmcm_branch,
+        source_branch.values[0],
+        source_branch.sources[0],
+        next(iter(model.source_logic_tree.composite_branches)),
+    ]
+    for example in examples:
+        print(f"{type(example).__name__:>22}: {instance_size(example)} bytes per instance")
+
+    _, realizations_size = allocated(lambda: list(model.realizations(0, N_REALIZATIONS)))
+    print(
+        f"{N_REALIZATIONS} realizations: {realizations_size / 1e6:.2f} MB "
+        f"({realizations_size / N_REALIZATIONS:.0f} bytes per realization)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark `LogicTree.top_composites` against sorting all of `LogicTree.composite_branches`.
+
+The logic trees have branch sets of N_BRANCHES random weights, so the number of composite branches grows as
+N_BRANCHES ** n_sets. Sorting is only timed while the full enumeration is practical.
+
+Usage:
+    python benchmarks/top_composites.py
+"""
+
+import random
+import timeit
+
+from nzshm_model.logic_tree import GMCMBranch, GMCMBranchSet, GMCMLogicTree
+
+N_BRANCHES = 6
+K = 100
+MAX_SORTED = 10**6
+
+
+def build_logic_tree(n_sets: int) -> GMCMLogicTree:
+    rnd = random.Random(n_sets)
+    branch_sets = []
+    for i_set in range(n_sets):
+        weights = [rnd.random() for _ in range(N_BRANCHES)]
+        branches = [
+            GMCMBranch(branch_id=f"{i_set}:{i}", weight=weight / sum(weights)) for i, weight in enumerate(weights)
+        ]
+        branch_sets.append(GMCMBranchSet(short_name=f"S{i_set}", branches=branches))
+    return GMCMLogicTree(branch_sets=branch_sets)
+
+
+def sorted_top(logic_tree: GMCMLogicTree, k: int) -> list:
+    """the approach replaced by top_composites: enumerate and sort every composite branch."""
+    return sorted(logic_tree.composite_branches, key=lambda composite: -composite.weight)[:k]
+
+
+def timed(func, *args) -> float:
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=3))
+
+
+def main():
+    print(f"{'sets':>4} {'composites':>12} {'sorted (s)':>11} {'top_composites (s)':>19}")
+    for n_sets in (4, 6, 8, 12):
+        logic_tree = build_logic_tree(n_sets)
+        n_composites = logic_tree.num_composite_branches
+        t_top = timed(logic_tree.top_composites, K)
+        if n_composites <= MAX_SORTED:
+            assert logic_tree.top_composites(K) == sorted_top(logic_tree, K)
+            sorted_time = f"{timed(sorted_top, logic_tree, K):>11.4f}"
+        else:
+            sorted_time = f"{'-':>11}"
+        print(f"{n_sets:>4} {n_composites:>12} {sorted_time} {t_top:>19.4f}")
+
+
+if __name__ == "__main__":
+    main()
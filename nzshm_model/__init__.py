@@ -36,6 +36,8 @@ Attributes:
 Functions:
     all_model_versions: lists the available model versions strings
     get_model_version: Get the model instance specified
+    all_model_manifests: lists the manifests of the available model versions
+    get_model_manifest: Get the manifest (version, title, resource digests and branch counts) of a model version
 
 """
 
@@ -44,4 +46,11 @@ from . import branch_registry
 # Python package version is different than the NSHM MODEL version !!
 from ._version import __version__
 from .model import NshmModel
-from .model_version import CURRENT_VERSION, all_model_versions, get_model_version, versions
+from .model_version import (
+    CURRENT_VERSION,
+    all_model_manifests,
+    all_model_versions,
+    get_model_manifest,
+    get_model_version,
+    versions,
+)
@@ -3,11 +3,11 @@ Classes for defining logic tree branches
 """
 
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections.abc import Hashable, Iterator, Sequence
 from dataclasses import dataclass, field
 from functools import reduce
 from operator import mul
-from typing import TYPE_CHECKING, TypeVar
+from typing import TYPE_CHECKING, Any, TypeVar
 
 if TYPE_CHECKING:
     from .logic_tree_base import BranchSet, FilteredBranch, LogicTree
@@ -15,11 +15,23 @@ if TYPE_CHECKING:
 BranchType = TypeVar("BranchType", bound="Branch")
 
 
-@dataclass
-class Branch(ABC):
+class _IdentityKeyCache:
+    # dataclass slots are only made for fields, so the cache slot is declared by a base class
+    __slots__ = ('_identity_key_cache',)
+    _identity_key_cache: Hashable | None
+
+
+@dataclass(slots=True)
+class Branch(_IdentityKeyCache, ABC):
     """
     Abstract baseclass for logic tree branches
 
+    Branches are hashable by their `identity_key`, so they can be used in sets and as dict keys. Subclasses that
+    are dataclasses must restore `__hash__ = Branch.__hash__`, as the dataclass decorator removes it.
+
+    Branch classes are slotted dataclasses (no per-instance `__dict__`); slotted subclasses must not use `super()`
+    without arguments.
+
     Arguments:
         name: a name for the branch
         weight: a weight for the branch
@@ -28,6 +40,38 @@ class Branch(ABC):
     branch_id: str = ""
     weight: float = 1.0
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name != '_identity_key_cache':
+            object.__setattr__(self, '_identity_key_cache', None)
+
+    def __hash__(self) -> int:
+        return hash(self.identity_key)
+
+    @property
+    def identity_key(self) -> Hashable:
+        """
+        A hashable key identifying the branch. Equal branches have equal keys.
+
+        The key is cached, and reset when an attribute of the branch is assigned. Call `reset_identity_key()` after
+        modifying a list or dict attribute in place.
+
+        Returns:
+            the identity key
+        """
+        key = getattr(self, '_identity_key_cache', None)
+        if key is None:
+            key = self._identity_key()
+            self._identity_key_cache = key
+        return key
+
+    def _identity_key(self) -> tuple:
+        return (type(self), self.branch_id)
+
+    def reset_identity_key(self) -> None:
+        """Reset the cached identity key."""
+        self._identity_key_cache = None
+
     @abstractmethod
     def filtered_branch(self, logic_tree: 'LogicTree', branch_set: 'BranchSet') -> 'FilteredBranch':
         """
@@ -43,7 +87,7 @@ class Branch(ABC):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CompositeBranch:
     """
     A logic tree branch comprised of combinations of branches from one or more branch sets.
@@ -59,13 +103,5 @@ class CompositeBranch:
     def __post_init__(self) -> None:
         self.weight = reduce(mul, [branch.weight for branch in self.branches], 1.0)
 
-    def __iter__(self):
-        self.__counter = 0
-        return self
-
-    def __next__(self):
-        if self.__counter >= len(self.branches):
-            raise StopIteration
-        else:
-            self.__counter += 1
-            return self.branches[self.__counter - 1]
+    def __iter__(self) -> Iterator[Branch]:
+        return iter(self.branches)
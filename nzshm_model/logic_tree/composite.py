@@ -0,0 +1,592 @@
+"""
+Index-space helpers for the composite branches of a logic tree.
+
+A composite branch is addressed by the position of its component branch in each branch set, taken in
+`LogicTree.branch_sets` order. Working with these integer indices (rather than `CompositeBranch` objects) lets us
+compute weights for every combination of branches with NumPy.
+
+Correlations are resolved to positions in the same way: each branch of a `Correlation` is located in the logic tree
+by identity, falling back to equality (as used by `LogicTree.composite_branches`).
+"""
+
+import heapq
+from collections.abc import Iterator
+from dataclasses import dataclass
+from functools import reduce
+from itertools import product
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from .branch import Branch
+    from .logic_tree_base import LogicTree
+
+Position = tuple[int, int]
+
+# the relative rounding error allowed for in the weight bounds of pruned enumeration
+_BOUND_TOLERANCE = 1e-12
+
+
+@dataclass(frozen=True)
+class ResolvedCorrelation:
+    """
+    A correlation with its branches located in the logic tree.
+
+    Arguments:
+        weight: the weight of composite branches formed by the correlation
+        primary: (branch set index, branch index) of the primary branch
+        associated: positions of the associated branches, None where a branch is not in the logic tree
+    """
+
+    weight: float
+    primary: Position
+    associated: tuple[Position | None, ...]
+
+    @property
+    def positions(self) -> tuple[Position | None, ...]:
+        """positions of all branches in the correlation, primary first."""
+        return (self.primary,) + self.associated
+
+
+class BranchLocator:
+    """
+    Locates branches in the branch sets of a logic tree using hash indexes of the branches.
+
+    Branches are matched by identity, falling back to equality.
+
+    Arguments:
+        logic_tree: the logic tree to search
+    """
+
+    def __init__(self, logic_tree: 'LogicTree'):
+        self._by_identity: dict[int, Position] = {}
+        self._by_equality: dict[Branch, Position] = {}
+        for i_set, branch_set in enumerate(logic_tree.branch_sets):
+            for i_branch, branch in enumerate(branch_set.branches):
+                self._by_identity.setdefault(id(branch), (i_set, i_branch))
+                self._by_equality.setdefault(branch, (i_set, i_branch))
+
+    def position(self, branch: 'Branch') -> Position | None:
+        """
+        Find the position of a branch.
+
+        Parameters:
+            branch: the branch to find
+
+        Returns:
+            (branch set index, branch index) of the branch, None if it is not in the logic tree
+        """
+        position = self._by_identity.get(id(branch))
+        if position is None:
+            position = self._by_equality.get(branch)
+        return position
+
+
+def resolve_correlations(logic_tree: 'LogicTree') -> list[ResolvedCorrelation]:
+    """
+    Locate the branches of each correlation group in the logic tree branch sets.
+
+    Correlations whose primary branch is not in the logic tree can never apply and are dropped.
+
+    Parameters:
+        logic_tree: the logic tree
+
+    Returns:
+        resolved correlations, in the order of `logic_tree.correlations`
+    """
+    if not logic_tree.correlations:
+        return []
+    locator = BranchLocator(logic_tree)
+    resolved = []
+    for correlation in logic_tree.correlations.correlation_groups:
+        primary = locator.position(correlation.primary_branch)
+        if primary is None:
+            continue
+        associated = tuple(locator.position(branch) for branch in correlation.associated_branches)
+        weight = correlation.weight if correlation.weight is not None else correlation.primary_branch.weight
+        resolved.append(ResolvedCorrelation(weight=weight, primary=primary, associated=associated))
+    return resolved
+
+
+def composite_weights(logic_tree: 'LogicTree') -> tuple[npt.NDArray[np.float64], npt.NDArray[np.intp]]:
+    """
+    Compute the weights and branch indices of all valid composite branches of a logic tree.
+
+    The weights are formed as one outer product over the branch sets. Correlations are then applied as a mask
+    (removing invalid combinations) and as weight overrides for the correlated combinations.
+
+    Parameters:
+        logic_tree: the logic tree
+
+    Returns:
+        weights: weight of each composite branch, shape (n,)
+        indices: branch index in each branch set of each composite branch, shape (n, len(branch_sets)).
+            Rows are in the same order as `LogicTree.composite_branches`.
+    """
+    branch_weights = [
+        np.array([branch.weight for branch in branch_set.branches], dtype=float)
+        for branch_set in logic_tree.branch_sets
+    ]
+    n_sets = len(branch_weights)
+    if n_sets == 0:
+        return np.ones(1), np.empty((1, 0), dtype=np.intp)
+
+    shape = tuple(len(weights) for weights in branch_weights)
+    indices = np.indices(shape).reshape(n_sets, -1).T
+    weights = reduce(np.multiply.outer, branch_weights).ravel()
+
+    resolved = resolve_correlations(logic_tree)
+    if not resolved:
+        return weights, indices
+
+    # the first correlation with its primary branch present governs the composite branch
+    governing = np.full(len(indices), -1)
+    for i_cor in reversed(range(len(resolved))):
+        i_set, i_branch = resolved[i_cor].primary
+        governing[indices[:, i_set] == i_branch] = i_cor
+
+    valid = np.ones(len(indices), dtype=bool)
+    for i_cor, correlation in enumerate(resolved):
+        rows = np.flatnonzero(governing == i_cor)
+        if not len(rows):
+            continue
+        if None in correlation.associated:
+            valid[rows] = False
+            continue
+        matched = np.ones(len(rows), dtype=bool)
+        for i_set, i_branch in correlation.associated:  # type: ignore[misc]
+            matched &= indices[rows, i_set] == i_branch
+        valid[rows] = matched
+
+        correlated_sets = {position[0] for position in correlation.positions}  # type: ignore[index]
+        override = np.full(len(rows), correlation.weight)
+        for i_set in range(n_sets):
+            if i_set not in correlated_sets:
+                override *= branch_weights[i_set][indices[rows, i_set]]
+        weights[rows] = override
+
+    return weights[valid], indices[valid]
+
+
+class AliasTable:
+    """
+    Walker's alias table for drawing indices in proportion to their weights in constant time per draw.
+
+    Arguments:
+        weights: the (non-negative) weight of each index, they need not sum to 1.0
+
+    Raises:
+        ValueError: if there are no weights, a weight is negative or all weights are zero
+    """
+
+    def __init__(self, weights: list[float] | npt.NDArray[np.float64]):
+        weights = np.asarray(weights, dtype=float)
+        total = weights.sum()
+        if not len(weights) or (weights < 0).any() or total <= 0:
+            raise ValueError("weights must be non-negative and not all zero")
+
+        size = len(weights)
+        scaled = weights * size / total
+        self.probability = np.ones(size)
+        self.alias = np.arange(size)
+        small = [i for i in range(size) if scaled[i] < 1.0]
+        large = [i for i in range(size) if scaled[i] >= 1.0]
+        while small and large:
+            i_small, i_large = small.pop(), large.pop()
+            self.probability[i_small] = scaled[i_small]
+            self.alias[i_small] = i_large
+            scaled[i_large] -= 1.0 - scaled[i_small]
+            (small if scaled[i_large] < 1.0 else large).append(i_large)
+        # whatever is left over (by rounding) is kept with probability 1
+
+    def sample(self, rng: np.random.Generator, size: int) -> npt.NDArray[np.intp]:
+        """
+        Draw indices in proportion to their weights.
+
+        Parameters:
+            rng: the random number generator
+            size: the number of indices to draw
+
+        Returns:
+            the drawn indices, shape (size,)
+        """
+        columns = rng.integers(len(self.probability), size=size)
+        keep = rng.random(size) < self.probability[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+
+@dataclass(frozen=True)
+class CompositeCase:
+    """
+    A set of valid composite branches that is the full product of the allowed branches of each branch set.
+
+    The valid composite branches of a logic tree are the disjoint union of one case where no correlation applies and
+    one case for each correlation group governing the composite branch.
+
+    Arguments:
+        allowed: for each branch set, the (sorted) indices of the branches allowed in this case
+        weight: weight factor of the case (the correlation weight, or 1.0)
+        weighted: for each branch set, whether the branch weight contributes to the composite branch weight
+    """
+
+    allowed: tuple[tuple[int, ...], ...]
+    weight: float
+    weighted: tuple[bool, ...]
+
+    def composite_weight(self, branch_weights: list[list[float]], indices: tuple[int, ...]) -> float:
+        """the weight of the composite branch with the given indices."""
+        weight = self.weight
+        for i_set, i_branch in enumerate(indices):
+            if self.weighted[i_set]:
+                weight *= branch_weights[i_set][i_branch]
+        return weight
+
+
+class CompositeSpace:
+    """
+    The valid composite branches of a logic tree, with correlations compiled into constraints.
+
+    Composite branches are produced in the same order as `itertools.product` over the branch sets, but
+    combinations that break a correlation are never generated.
+
+    Arguments:
+        branch_weights: the branch weights of each branch set
+        correlations: the correlations resolved to positions in the branch sets
+    """
+
+    def __init__(self, branch_weights: list[list[float]], correlations: list[ResolvedCorrelation]):
+        self.branch_weights = branch_weights
+        self.shape = tuple(len(weights) for weights in branch_weights)
+        self.cases = self._build_cases(correlations)
+        self._allowed_sets = [[frozenset(allowed) for allowed in case.allowed] for case in self.cases]
+        # the number of combinations of each case from each branch set onwards
+        self._suffix_counts = []
+        for case in self.cases:
+            counts = [1]
+            for allowed in reversed(case.allowed):
+                counts.insert(0, counts[0] * len(allowed))
+            self._suffix_counts.append(counts)
+
+    @classmethod
+    def from_logic_tree(cls, logic_tree: 'LogicTree') -> 'CompositeSpace':
+        """
+        Create the CompositeSpace of a logic tree.
+
+        Parameters:
+            logic_tree: the logic tree
+
+        Returns:
+            the composite space
+        """
+        branch_weights = [[branch.weight for branch in branch_set.branches] for branch_set in logic_tree.branch_sets]
+        return cls(branch_weights, resolve_correlations(logic_tree))
+
+    def _build_cases(self, correlations: list[ResolvedCorrelation]) -> list[CompositeCase]:
+        n_sets = len(self.shape)
+
+        # the lowest correlation index for which a branch is primary, n_cor if none
+        n_cor = len(correlations)
+        governs = [[n_cor] * size for size in self.shape]
+        for i_cor in reversed(range(n_cor)):
+            i_set, i_branch = correlations[i_cor].primary
+            governs[i_set][i_branch] = i_cor
+
+        def below(i_set: int, limit: int) -> tuple[int, ...]:
+            return tuple(i_branch for i_branch in range(self.shape[i_set]) if governs[i_set][i_branch] > limit)
+
+        cases = []
+        uncorrelated = CompositeCase(
+            allowed=tuple(below(i_set, n_cor - 1) for i_set in range(n_sets)),
+            weight=1.0,
+            weighted=(True,) * n_sets,
+        )
+        cases.append(uncorrelated)
+
+        for i_cor, correlation in enumerate(correlations):
+            if None in correlation.associated:
+                continue
+            fixed: dict[int, int] = {}
+            consistent = True
+            for i_set, i_branch in correlation.positions:  # type: ignore[misc]
+                # a correlated branch that is primary in an earlier correlation cannot be governed by this one
+                if fixed.get(i_set, i_branch) != i_branch or governs[i_set][i_branch] < i_cor:
+                    consistent = False
+                fixed[i_set] = i_branch
+            if not consistent:
+                continue
+            cases.append(
+                CompositeCase(
+                    allowed=tuple(
+                        (fixed[i_set],) if i_set in fixed else below(i_set, i_cor) for i_set in range(n_sets)
+                    ),
+                    weight=correlation.weight,
+                    weighted=tuple(i_set not in fixed for i_set in range(n_sets)),
+                )
+            )
+
+        return [case for case in cases if all(case.allowed)]
+
+    def __len__(self) -> int:
+        """The number of valid composite branches, computed per case without enumerating them."""
+        return sum(counts[0] for counts in self._suffix_counts)
+
+    def indices_at(self, index: int) -> tuple[int, ...]:
+        """
+        Decode the branch indices of the composite branch at a position in the enumeration order.
+
+        Each case is a mixed-radix number over its allowed branches, so no composite branches are enumerated.
+
+        Parameters:
+            index: position of the composite branch, negative values count from the end
+
+        Raises:
+            IndexError: if the index is out of range
+
+        Returns:
+            the branch indices of the composite branch
+        """
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("composite branch index out of range")
+
+        cases = list(range(len(self.cases)))
+        indices: list[int] = []
+        for depth in range(len(self.shape)):
+            if len(cases) == 1:
+                case = self.cases[cases[0]]
+                counts = self._suffix_counts[cases[0]]
+                for i_set in range(depth, len(self.shape)):
+                    position, index = divmod(index, counts[i_set + 1])
+                    indices.append(case.allowed[i_set][position])
+                break
+            for i_branch in range(self.shape[depth]):
+                matching = [i_case for i_case in cases if i_branch in self._allowed_sets[i_case][depth]]
+                count = sum(self._suffix_counts[i_case][depth + 1] for i_case in matching)
+                if index < count:
+                    indices.append(i_branch)
+                    cases = matching
+                    break
+                index -= count
+        return tuple(indices)
+
+    def weight(self, indices: tuple[int, ...]) -> float:
+        """
+        The weight of a valid composite branch.
+
+        Parameters:
+            indices: the branch indices of the composite branch
+
+        Raises:
+            ValueError: if the composite branch breaks a correlation
+
+        Returns:
+            the weight
+        """
+        for i_case, case in enumerate(self.cases):
+            if all(i_branch in allowed for i_branch, allowed in zip(indices, self._allowed_sets[i_case], strict=True)):
+                return case.composite_weight(self.branch_weights, indices)
+        raise ValueError(f"composite branch {indices} is not valid")
+
+    def total_weight(self) -> float:
+        """
+        The sum of the weights of all valid composite branches, computed per case without enumerating them.
+
+        Returns:
+            the total weight
+        """
+        return sum(self.case_weights())
+
+    def case_weights(self) -> list[float]:
+        """The total weight of the composite branches of each case, in `cases` order."""
+        weights = []
+        for case in self.cases:
+            weight = case.weight
+            for i_set, allowed in enumerate(case.allowed):
+                if case.weighted[i_set]:
+                    weight *= sum(self.branch_weights[i_set][i_branch] for i_branch in allowed)
+            weights.append(weight)
+        return weights
+
+    def sample(self, n: int, rng: np.random.Generator) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.intp]]:
+        """
+        Draw valid composite branches at random, in proportion to their weights.
+
+        A case is drawn in proportion to its total weight, then the branch of each branch set is drawn from the
+        allowed branches of the case, using alias tables. Correlated branches are fixed by the case, so a
+        correlation group is drawn as a unit with the correlation weight.
+
+        Parameters:
+            n: the number of composite branches to draw
+            rng: the random number generator
+
+        Raises:
+            ValueError: if no composite branch has weight
+
+        Returns:
+            weights: weight of each composite branch drawn, shape (n,)
+            indices: branch index in each branch set of each composite branch drawn, shape (n, len(branch_sets))
+        """
+        case_weights = self.case_weights()
+        if not sum(case_weights) > 0:
+            raise ValueError("there are no composite branches with weight to draw")
+
+        n_sets = len(self.shape)
+        indices = np.empty((n, n_sets), dtype=np.intp)
+        weights = np.empty(n)
+        case_ids = AliasTable(case_weights).sample(rng, n)
+        for i_case, case in enumerate(self.cases):
+            rows = np.flatnonzero(case_ids == i_case)
+            if not len(rows):
+                continue
+            weights[rows] = case.weight
+            for i_set, allowed in enumerate(case.allowed):
+                if not case.weighted[i_set]:
+                    indices[rows, i_set] = allowed[0]
+                    continue
+                allowed_weights = np.array([self.branch_weights[i_set][i_branch] for i_branch in allowed])
+                drawn = AliasTable(allowed_weights).sample(rng, len(rows))
+                indices[rows, i_set] = np.asarray(allowed)[drawn]
+                weights[rows] *= allowed_weights[drawn]
+        return weights, indices
+
+    def __iter__(self) -> Iterator[tuple[tuple[int, ...], float]]:
+        """
+        Yield the branch indices and weight of every valid composite branch.
+
+        Yields:
+            (indices, weight) for each composite branch in `itertools.product` order
+        """
+        yield from self.iter_range(0, len(self))
+
+    def iter_by_weight(self) -> Iterator[tuple[tuple[int, ...], float]]:
+        """
+        Yield the branch indices and weight of the valid composite branches, heaviest first.
+
+        Each case is a product of independent factors, so its composite branches are searched best-first: the
+        allowed branches of each branch set are ranked by weight and a heap holds the frontier of rank combinations,
+        starting from the top ranked combination of each case. Only the branches yielded (and their frontier) are
+        visited. Equal weights are yielded in `itertools.product` order.
+
+        Yields:
+            (indices, weight) for each composite branch, by decreasing weight
+        """
+        rankings = []
+        heap: list[tuple[float, tuple[int, ...], int, tuple[int, ...], int]] = []
+        for i_case, case in enumerate(self.cases):
+            ranking = [
+                sorted(allowed, key=self.branch_weights[i_set].__getitem__, reverse=True)
+                if case.weighted[i_set]
+                else list(allowed)
+                for i_set, allowed in enumerate(case.allowed)
+            ]
+            rankings.append(ranking)
+            self._push_ranks(heap, i_case, ranking, (0,) * len(ranking), 0)
+
+        while heap:
+            negative_weight, indices, i_case, ranks, last = heapq.heappop(heap)
+            yield indices, -negative_weight
+            # each rank combination is reached once: from its parent, by advancing a rank at or after the last
+            # one advanced
+            for i_set in range(last, len(ranks)):
+                if ranks[i_set] + 1 < len(rankings[i_case][i_set]):
+                    advanced = ranks[:i_set] + (ranks[i_set] + 1,) + ranks[i_set + 1 :]
+                    self._push_ranks(heap, i_case, rankings[i_case], advanced, i_set)
+
+    def _push_ranks(
+        self,
+        heap: list[tuple[float, tuple[int, ...], int, tuple[int, ...], int]],
+        i_case: int,
+        ranking: list[list[int]],
+        ranks: tuple[int, ...],
+        last: int,
+    ) -> None:
+        indices = tuple(ranking[i_set][rank] for i_set, rank in enumerate(ranks))
+        weight = self.cases[i_case].composite_weight(self.branch_weights, indices)
+        heapq.heappush(heap, (-weight, indices, i_case, ranks, last))
+
+    def iter_above(self, min_weight: float) -> Iterator[tuple[tuple[int, ...], float]]:
+        """
+        Yield the branch indices and weight of the valid composite branches weighing at least min_weight.
+
+        The product of each case is searched depth first and a sub-tree is pruned when the weight of its prefix,
+        times the largest weights of the remaining branch sets, is below min_weight.
+
+        Parameters:
+            min_weight: the smallest weight of a composite branch to yield
+
+        Yields:
+            (indices, weight) for each composite branch of at least min_weight, in `itertools.product` order
+        """
+        yield from heapq.merge(*(self._walk_above(case, min_weight) for case in self.cases))
+
+    def _walk_above(self, case: CompositeCase, min_weight: float) -> Iterator[tuple[tuple[int, ...], float]]:
+        n_sets = len(self.shape)
+        factors = [
+            [(i_branch, self.branch_weights[i_set][i_branch] if case.weighted[i_set] else 1.0) for i_branch in allowed]
+            for i_set, allowed in enumerate(case.allowed)
+        ]
+        # the largest weight that the branch sets from each depth onwards can contribute
+        suffix_max = [1.0] * (n_sets + 1)
+        for i_set in reversed(range(n_sets)):
+            suffix_max[i_set] = suffix_max[i_set + 1] * max(factor for _, factor in factors[i_set])
+
+        # the bounds multiply the weights in another order than the composite weights, so they may round to just
+        # below a composite weight; sub-trees are pruned only when their bound is clearly below min_weight, and the
+        # composite weights are compared exactly
+        min_bound = min_weight * (1 - _BOUND_TOLERANCE)
+
+        def walk(prefix: tuple[int, ...], weight: float) -> Iterator[tuple[tuple[int, ...], float]]:
+            depth = len(prefix)
+            if depth == n_sets:
+                if weight >= min_weight:
+                    yield prefix, weight
+                return
+            for i_branch, factor in factors[depth]:
+                if weight * factor * suffix_max[depth + 1] >= min_bound:
+                    yield from walk(prefix + (i_branch,), weight * factor)
+
+        if case.weight * suffix_max[0] >= min_bound:
+            yield from walk((), case.weight)
+
+    def iter_range(self, start: int, stop: int) -> Iterator[tuple[tuple[int, ...], float]]:
+        """
+        Yield the branch indices and weight of the composite branches at positions start to stop (exclusive).
+
+        Branches outside the range are skipped a whole sub-tree at a time, using the case counts.
+
+        Parameters:
+            start: position of the first composite branch
+            stop: position after the last composite branch
+
+        Yields:
+            (indices, weight) for each composite branch in the range
+        """
+        start, stop = max(start, 0), min(stop, len(self))
+        if start < stop:
+            yield from self._walk((), list(range(len(self.cases))), start, stop)
+
+    def _walk(
+        self, prefix: tuple[int, ...], cases: list[int], start: int, stop: int
+    ) -> Iterator[tuple[tuple[int, ...], float]]:
+        depth = len(prefix)
+        if len(cases) == 1 and start == 0 and stop >= self._suffix_counts[cases[0]][depth]:
+            # the whole sub-tree is in range and in one case, so it is a plain product
+            case = self.cases[cases[0]]
+            for suffix in product(*case.allowed[depth:]):
+                indices = prefix + suffix
+                yield indices, case.composite_weight(self.branch_weights, indices)
+            return
+
+        for i_branch in range(self.shape[depth]):
+            if stop <= 0:
+                return
+            matching = [i_case for i_case in cases if i_branch in self._allowed_sets[i_case][depth]]
+            count = sum(self._suffix_counts[i_case][depth + 1] for i_case in matching)
+            if count and start < count:
+                yield from self._walk(prefix + (i_branch,), matching, max(start, 0), min(stop, count))
+            start -= count
+            stop -= count
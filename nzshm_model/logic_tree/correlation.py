@@ -6,6 +6,7 @@ import collections
 import collections.abc
 from collections.abc import Generator, Sequence
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import overload
 
 from .branch import Branch
@@ -52,6 +53,10 @@ class LogicTreeCorrelations(collections.abc.Sequence):
     """
     All correlations for a logic tree.
 
+    Primary branches are indexed by their hashable `identity_key` so that the correlation group of a branch is found
+    without scanning every group. The index is built when first used, so `correlation_groups` should not be modified
+    afterwards.
+
     Arguments:
         correlation_groups: list of correlations to be applied to the logic tree branch sets.
     """
@@ -71,6 +76,25 @@ class LogicTreeCorrelations(collections.abc.Sequence):
         for cor in self.correlation_groups:
             yield cor.primary_branch
 
+    @cached_property
+    def _primary_index(self) -> dict[Branch, int]:
+        index: dict[Branch, int] = {}
+        for i_cor, cor in enumerate(self.correlation_groups):
+            index.setdefault(cor.primary_branch, i_cor)
+        return index
+
+    def primary_index(self, branch: Branch) -> int | None:
+        """
+        Find the correlation group for which a branch is the primary branch.
+
+        Parameters:
+            branch: the branch to look up
+
+        Returns:
+            index of the correlation group, None if the branch is not a primary branch
+        """
+        return self._primary_index.get(branch)
+
     @overload
     def __getitem__(self, i: int) -> Correlation: ...  # noqa: E704
 
@@ -90,6 +114,6 @@ def _validate_correlations(ltcs: LogicTreeCorrelations) -> None:
     """
     check that there are no repeats in the 0th element of each correlation
     """
-    prim_branches = list(ltcs.primary_branches())
-    if len([branch for branch in prim_branches if prim_branches.count(branch) > 1]) != 0:
-        raise ValueError("there is a repeated branch in the 0th element of the correlations")
+    for i_cor, cor in enumerate(ltcs.correlation_groups):
+        if ltcs.primary_index(cor.primary_branch) != i_cor:
+            raise ValueError("there is a repeated branch in the 0th element of the correlations")
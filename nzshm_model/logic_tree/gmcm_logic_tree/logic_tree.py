@@ -5,10 +5,13 @@ Defines ground motion characterisation model logic tree structures used in NSHM.
 from dataclasses import dataclass, field
 from typing import Any
 
-from nzshm_model.logic_tree.logic_tree_base import Branch, BranchSet, FilteredBranch, LogicTree
+import numpy as np
 
+from nzshm_model.logic_tree.logic_tree_base import Branch, BranchSet, FilteredBranch, LogicTree, ValidationPolicy
+from nzshm_model.snapshot import SnapshotReader, SnapshotWriter
 
-@dataclass
+
+@dataclass(slots=True)
 class GMCMBranch(Branch):
     """
     A branch of the GMCM logic tree
@@ -25,6 +28,15 @@ class GMCMBranch(Branch):
     gsim_args: dict[str, Any] = field(default_factory=dict)
     tectonic_region_type: str = ""  # need a default becasue base class has a memeber with a default
 
+    __hash__ = Branch.__hash__
+
+    def _identity_key(self) -> tuple:
+        try:
+            gsim_args: frozenset = frozenset(self.gsim_args.items())
+        except TypeError:  # unhashable argument values
+            gsim_args = frozenset(self.gsim_args)
+        return (type(self), self.branch_id, self.gsim_name, gsim_args, self.tectonic_region_type)
+
     def filtered_branch(self, logic_tree, branch_set) -> 'GMCMFilteredBranch':
         """get a filtered branch containing reference to parent instances.
 
@@ -35,7 +47,7 @@ class GMCMBranch(Branch):
         Returns:
             a BMCMFilteredBranch instance
         """
-        return GMCMFilteredBranch(logic_tree=logic_tree, branch_set=branch_set, **self.__dict__)
+        return GMCMFilteredBranch.from_branch(self, logic_tree=logic_tree, branch_set=branch_set)
 
     @property
     def registry_identity(self):
@@ -78,8 +90,40 @@ class GMCMLogicTree(LogicTree['GMCMFilteredBranch']):
     # should we enforce that there is only one branch_set per TRT?
     branch_sets: list[GMCMBranchSet] = field(default_factory=list)
 
-    def __post_init__(self):
+    def __post_init__(self, validate: ValidationPolicy) -> None:
         self._fix_args()
+        # GMCM trees have always had their weights checked on creation (formerly when __init__ set the correlations),
+        # so the base class keeps that as the default 'eager' policy
+        super().__post_init__(validate)
+
+    def _snapshot_branches(self, writer: SnapshotWriter, branches: list[GMCMBranch]) -> None:
+        writer.array('branch.gsim_name', [writer.string(branch.gsim_name) for branch in branches], np.int64)
+        writer.array('branch.gsim_args', [writer.value(branch.gsim_args) for branch in branches], np.int64)
+        writer.array(
+            'branch.tectonic_region_type', [writer.string(branch.tectonic_region_type) for branch in branches], np.int64
+        )
+
+    @classmethod
+    def _branches_from_snapshot(
+        cls, reader: SnapshotReader, branch_ids: list[str], weights: list[float]
+    ) -> list[GMCMBranch]:
+        return [
+            GMCMBranch(
+                branch_id=branch_id,
+                weight=weight,
+                gsim_name=reader.strings[gsim_name],
+                gsim_args=reader.value(gsim_args),
+                tectonic_region_type=reader.strings[trt],
+            )
+            for branch_id, weight, gsim_name, gsim_args, trt in zip(
+                branch_ids,
+                weights,
+                reader.array('branch.gsim_name').tolist(),
+                reader.array('branch.gsim_args').tolist(),
+                reader.array('branch.tectonic_region_type').tolist(),
+                strict=True,
+            )
+        ]
 
     def _fix_args(self) -> 'GMCMLogicTree':
         """Replace string representations of numeric arguments with floats"""
@@ -92,6 +136,7 @@ class GMCMLogicTree(LogicTree['GMCMFilteredBranch']):
                 for k, v in branch.gsim_args.items():
                     if (isinstance(v, str)) and (is_number(v)):
                         branch.gsim_args[k] = float(v)
+                branch.reset_identity_key()
 
         return self
 
@@ -100,3 +145,5 @@ class GMCMLogicTree(LogicTree['GMCMFilteredBranch']):
 class GMCMFilteredBranch(FilteredBranch, GMCMBranch):
     logic_tree: 'GMCMLogicTree' = field(default_factory=GMCMLogicTree)
     branch_set: 'GMCMBranchSet' = field(default_factory=GMCMBranchSet)
+
+    __hash__ = Branch.__hash__
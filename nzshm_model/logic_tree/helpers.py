@@ -1,12 +1,28 @@
 import math
-from typing import TYPE_CHECKING
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Any
 
+from .composite import BranchLocator, CompositeSpace
 from .correlation import Correlation, LogicTreeCorrelations
 
 if TYPE_CHECKING:
     from .logic_tree_base import BranchSet, LogicTree, LogicTreeType
 
 
+def value_key(value: Any) -> Hashable:
+    """
+    A hashable key of a field value, used to share equal values in snapshots and interning pools.
+
+    Types are part of the key so that e.g. 1, 1.0 and True, which are equal, are not shared as one another. Lists,
+    tuples and dicts are keyed by content; other unhashable values give keys that raise TypeError when hashed.
+    """
+    if isinstance(value, list | tuple):
+        return (type(value), tuple(value_key(item) for item in value))
+    if isinstance(value, dict):
+        return (dict, tuple((value_key(k), value_key(v)) for k, v in value.items()))
+    return (type(value), value)
+
+
 ##############################
 # VALIDATORS
 ##############################
@@ -25,16 +41,18 @@ def _validate_branchset_weights(branch_set: 'BranchSet') -> None:
 
 def _validate_names(logic_tree: 'LogicTree') -> None:
     # do not allow duplicate branch_set.shortname:branch.name
-    branch_names = [f"{branch.branch_set.short_name}:{branch.branch_id}" for branch in logic_tree]
+    branch_names = [
+        _correlation_encoding(branch_set, branch)
+        for branch_set in logic_tree.branch_sets
+        for branch in branch_set.branches
+    ]
     if len(set(branch_names)) != len(branch_names):
         raise ValueError("branch_set.short_name:branch.branch_id must be unique")
 
 
 def _validate_correlation_weights(logic_tree: 'LogicTree') -> None:
-    # check that the weights total 1.0
-    weight_total = 0.0
-    for branch in logic_tree.composite_branches:
-        weight_total += branch.weight
+    # check that the weights total 1.0, without enumerating the composite branches
+    weight_total = CompositeSpace.from_logic_tree(logic_tree).total_weight()
     if not math.isclose(weight_total, 1.0):
         raise ValueError("the weights of the logic tree do not sum to 1.0 when correlations are applied")
 
@@ -58,13 +76,18 @@ def _correlation_encoding(branch_set, branch):
 
 def _add_corellations(logic_tree: 'LogicTreeType', correlations: list[str]) -> 'LogicTreeType':
 
-    branches = [branch for branch in logic_tree]
-    # branch_names = [f"{fbranch.branch_set.short_name}:{fbranch.name}" for fbranch in branches]
-    branch_names = [_correlation_encoding(fbranch.branch_set, fbranch) for fbranch in branches]
+    branches = {
+        _correlation_encoding(branch_set, branch): branch
+        for branch_set in logic_tree.branch_sets
+        for branch in branch_set.branches
+    }
     correlation_groups = []
     for correlation in correlations:
-        primary_branch = branches[branch_names.index(correlation[0])].to_branch()
-        assoc_branches = [branches[branch_names.index(b)].to_branch() for b in correlation[1:]]
+        try:
+            primary_branch = branches[correlation[0]]
+            assoc_branches = [branches[b] for b in correlation[1:]]
+        except KeyError as err:
+            raise ValueError(f"correlated branch {err} is not in the logic tree") from None
         correlation_groups.append(
             Correlation(
                 primary_branch=primary_branch,
@@ -77,16 +100,12 @@ def _add_corellations(logic_tree: 'LogicTreeType', correlations: list[str]) -> '
 
 
 def _serialise_correlations(logic_tree: 'LogicTree') -> list[list[str]]:
-    def find_branch_set(logic_tree, branch):
-        for fbranch in logic_tree:
-            if fbranch.to_branch() == branch:
-                return fbranch.branch_set
-
-    correlations = []
-    for cor in logic_tree.correlations.correlation_groups:
-        correlation = []
-        correlation.append(_correlation_encoding(find_branch_set(logic_tree, cor.primary_branch), cor.primary_branch))
-        for branch in cor.associated_branches:
-            correlation.append(_correlation_encoding(find_branch_set(logic_tree, branch), branch))
-        correlations.append(correlation)
-    return correlations
+    locator = BranchLocator(logic_tree)
+
+    def encode(branch):
+        position = locator.position(branch)
+        if position is None:
+            raise ValueError(f"correlated branch {branch.branch_id} is not in the logic tree")
+        return _correlation_encoding(logic_tree.branch_sets[position[0]], branch)
+
+    return [[encode(branch) for branch in cor.all_branches] for cor in logic_tree.correlations.correlation_groups]
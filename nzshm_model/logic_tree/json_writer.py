@@ -0,0 +1,148 @@
+"""
+Streaming JSON serialisation of logic trees.
+
+`json.dump(logic_tree.to_dict())` converts the whole logic tree to dicts (with `dataclasses.asdict`, which deep copies
+every value) before writing any of it. This module walks the logic tree instead, and writes it a branch at a time, so
+that only the dict of one branch is held at once.
+
+The JSON is the same as `json.dump(logic_tree.to_dict(), indent=indent)` writes, or with `asdict=True`, as
+`json.dump(dataclasses.asdict(logic_tree), indent=indent)` writes, with correlations as objects rather than branch
+names. Without an indent, the JSON is compact, without whitespace between items.
+
+Examples:
+    >>> with open('logic_tree.json', 'w') as jsonfile:
+    ...     write_json(logic_tree, jsonfile, indent=None)
+"""
+
+import dataclasses
+import json
+from collections.abc import Hashable, Iterator
+from functools import cache
+from typing import TYPE_CHECKING, Any, TextIO, cast
+
+import nzshm_model.logic_tree.helpers as helpers
+
+from .branch import Branch
+
+if TYPE_CHECKING:
+    from .logic_tree_base import LogicTree
+
+
+def write_json(logic_tree: 'LogicTree', file: TextIO, indent: int | None = 2, asdict: bool = False) -> None:
+    """
+    Write a logic tree as JSON to a text file, a branch at a time.
+
+    Parameters:
+        logic_tree: the logic tree
+        file: the file (or stream, e.g. `sys.stdout`) to write to
+        indent: the number of spaces to indent nested items by, or None for compact JSON
+        asdict: write the `dataclasses.asdict()` form of the logic tree instead of its `to_dict()` form
+
+    Raises:
+        ValueError: if the logic tree has correlations and its branch names are not unique
+    """
+    for chunk in iter_json(logic_tree, indent, asdict):
+        file.write(chunk)
+
+
+def iter_json(logic_tree: 'LogicTree', indent: int | None = 2, asdict: bool = False) -> Iterator[str]:
+    """
+    Yield the JSON of a logic tree in chunks, a branch at a time.
+
+    Parameters:
+        logic_tree: the logic tree
+        indent: the number of spaces to indent nested items by, or None for compact JSON
+        asdict: yield the `dataclasses.asdict()` form of the logic tree instead of its `to_dict()` form
+
+    Raises:
+        ValueError: if the logic tree has correlations and its branch names are not unique
+
+    Yields:
+        consecutive chunks of the JSON text
+    """
+    yield from _iter_object(_tree_items(logic_tree, asdict), 0, indent)
+
+
+def _tree_items(logic_tree: 'LogicTree', asdict: bool) -> Iterator[tuple[str, Any]]:
+    # the items of `LogicTree.to_dict()`: correlations are serialised as branch names, and left out if there are none;
+    # `dataclasses.asdict()` keeps the correlation objects as they are
+    for f in dataclasses.fields(logic_tree):
+        value = getattr(logic_tree, f.name)
+        if f.name == 'correlations' and not asdict:
+            if not value:
+                continue
+            helpers._validate_names(logic_tree)
+            value = helpers._serialise_correlations(logic_tree)
+        yield f.name, value
+
+
+def _iter_value(value: Any, level: int, indent: int | None) -> Iterator[str]:
+    # branches are encoded whole; the logic tree, branch sets and lists of them are written an item at a time
+    if isinstance(value, Branch) or not (isinstance(value, list) or _is_dataclass_instance(value)):
+        yield _encode(_plain(value), level, indent)
+    elif isinstance(value, list):
+        yield from _iter_list(value, level, indent)
+    else:
+        yield from _iter_object(((name, getattr(value, name)) for name in _field_names(value)), level, indent)
+
+
+def _iter_object(items: Iterator[tuple[str, Any]], level: int, indent: int | None) -> Iterator[str]:
+    item_separator, key_separator, newline, closing = _separators(level, indent)
+    separator = '{' + newline
+    for key, value in items:
+        yield separator + json.dumps(key) + key_separator
+        yield from _iter_value(value, level + 1, indent)
+        separator = item_separator
+    yield '{}' if separator.startswith('{') else closing + '}'
+
+
+def _iter_list(values: list, level: int, indent: int | None) -> Iterator[str]:
+    if not values:
+        yield '[]'
+        return
+    item_separator, _, newline, closing = _separators(level, indent)
+    separator = '[' + newline
+    for value in values:
+        yield separator
+        yield from _iter_value(value, level + 1, indent)
+        separator = item_separator
+    yield closing + ']'
+
+
+def _separators(level: int, indent: int | None) -> tuple[str, str, str, str]:
+    # the item and key separators, the newline opening a container at a level and the text before its closing bracket
+    if indent is None:
+        return ',', ':', '', ''
+    newline = '\n' + ' ' * (indent * (level + 1))
+    return ',' + newline, ': ', newline, '\n' + ' ' * (indent * level)
+
+
+def _encode(value: Any, level: int, indent: int | None) -> str:
+    if indent is None:
+        return json.dumps(value, separators=(',', ':'))
+    # strings are escaped in JSON, so the only newlines are those json inserts, which are indented to the level
+    return json.dumps(value, indent=indent).replace('\n', '\n' + ' ' * (indent * level))
+
+
+def _plain(value: Any) -> Any:
+    # as `dataclasses.asdict`, without copying values that JSON encodes as they are
+    if _is_dataclass_instance(value):
+        return {name: _plain(getattr(value, name)) for name in _field_names(value)}
+    if isinstance(value, list | tuple):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def _is_dataclass_instance(value: Any) -> bool:
+    return dataclasses.is_dataclass(value) and not isinstance(value, type)
+
+
+def _field_names(instance: Any) -> tuple[str, ...]:
+    return _class_field_names(cast(Hashable, type(instance)))
+
+
+@cache
+def _class_field_names(data_class: type) -> tuple[str, ...]:
+    return tuple(f.name for f in dataclasses.fields(data_class))
@@ -0,0 +1,231 @@
+"""
+Fast loading of logic trees from JSON data.
+
+`dacite.from_dict` inspects the type hints of every field of every object it builds, so loading a logic tree repeats
+the same work for each branch, source and attribute value. This module compiles a loader for each dataclass from its
+type hints once, and reuses it for every object of that class.
+
+The loaders build the same objects as `dacite.from_dict` with `Config(strict=True, cast=[tuple])` and raise the same
+`dacite` exceptions for unexpected keys, missing values and values of the wrong type. The supported type hints are
+dataclasses, `list`, `tuple`, `dict`, unions, `Literal`, `Any` and plain classes, which cover the logic tree classes.
+
+JSON files are decoded with `orjson` when it is installed (the optional `speedups` dependency), and with the standard
+library `json` module otherwise.
+"""
+
+import dataclasses
+import json
+import types
+import typing
+from collections.abc import Callable, Hashable, Mapping
+from functools import cache
+from pathlib import Path
+from typing import Any, TypeVar, cast
+
+from dacite import (
+    DaciteError,
+    DaciteFieldError,
+    MissingValueError,
+    UnexpectedDataError,
+    UnionMatchError,
+    WrongTypeError,
+)
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None  # type: ignore[assignment]
+
+DataclassType = TypeVar('DataclassType')
+Loader = Callable[[Any], Any]
+
+
+def load_json(json_path: Path | str) -> Any:
+    """
+    Decode a JSON file, with `orjson` if it is installed.
+
+    Parameters:
+        json_path: path to the JSON file
+
+    Returns:
+        the decoded data
+    """
+    if orjson is not None:
+        return orjson.loads(Path(json_path).read_bytes())
+    with Path(json_path).open() as jsonfile:
+        return json.load(jsonfile)
+
+
+def from_dict(data_class: type[DataclassType], data: Any) -> DataclassType:
+    """
+    Create a dataclass instance from a dict, as `dacite.from_dict` with `Config(strict=True, cast=[tuple])`.
+
+    Parameters:
+        data_class: the dataclass
+        data: the dict representation of the instance
+
+    Returns:
+        the dataclass instance
+
+    Raises:
+        dacite.DaciteError: if the data does not match the dataclass fields
+    """
+    return dataclass_loader(cast(Hashable, data_class))(data)
+
+
+@cache
+def dataclass_loader(data_class: type) -> Loader:
+    """
+    The compiled loader of a dataclass.
+
+    Parameters:
+        data_class: the dataclass
+
+    Returns:
+        a function creating an instance of the dataclass from a dict
+    """
+    # the field loaders are compiled when first used, so that recursive dataclasses can be compiled; they are
+    # assigned at once so that threads loading concurrently never see them partly compiled
+    compiled: tuple[list[tuple[str, Loader]], frozenset[str], set[str]] | None = None
+
+    def load(data: Any) -> Any:
+        if not isinstance(data, Mapping):
+            raise WrongTypeError(field_type=data_class, value=data)
+        nonlocal compiled
+        if compiled is None:
+            field_loaders, required = _field_loaders(data_class)
+            compiled = field_loaders, frozenset(name for name, _ in field_loaders), required
+        field_loaders, names, required = compiled
+        unexpected = data.keys() - names
+        if unexpected:
+            raise UnexpectedDataError(keys=unexpected)
+        kwargs = {}
+        for name, load_field in field_loaders:
+            if name in data:
+                try:
+                    kwargs[name] = load_field(data[name])
+                except DaciteFieldError as error:
+                    error.update_path(name)
+                    raise
+            elif name in required:
+                raise MissingValueError(name)
+        return data_class(**kwargs)
+
+    return load
+
+
+def _field_loaders(data_class: type) -> tuple[list[tuple[str, Loader]], set[str]]:
+    # the loader of each init field (including init-only variables) and the names of the required fields
+    hints = typing.get_type_hints(data_class)
+    field_loaders = []
+    required = set()
+    for f in data_class.__dataclass_fields__.values():  # type: ignore[attr-defined]
+        if not f.init:
+            continue
+        field_type = hints[f.name]
+        if isinstance(field_type, dataclasses.InitVar):
+            field_type = field_type.type
+        field_loaders.append((f.name, _type_loader(field_type)))
+        if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+            required.add(f.name)
+    return field_loaders, required
+
+
+def _type_loader(type_: Any) -> Loader:
+    origin = typing.get_origin(type_)
+    args = typing.get_args(type_)
+
+    if type_ is Any:
+        return lambda data: data
+    if dataclasses.is_dataclass(type_):
+        return dataclass_loader(type_)  # type: ignore[arg-type]
+    if origin is typing.Union or origin is types.UnionType:
+        return _union_loader(type_, args)
+    if origin is typing.Literal:
+        return _literal_loader(type_, args)
+    if origin is list:
+        return _list_loader(type_, _type_loader(args[0]) if args else _type_loader(Any))
+    if origin is tuple:
+        return _tuple_loader(type_, args)
+    if origin is dict:
+        key_type, value_type = args if args else (Any, Any)
+        return _dict_loader(type_, _type_loader(key_type), _type_loader(value_type))
+    if isinstance(type_, type):
+        return _instance_loader(type_)
+    raise TypeError(f"type {type_} is not supported")
+
+
+def _instance_loader(type_: type) -> Loader:
+    # as PEP 484 (and dacite), ints are acceptable floats
+    accepted: type | tuple[type, ...] = (int, float) if type_ is float else type_
+
+    def load(data: Any) -> Any:
+        if not isinstance(data, accepted):
+            raise WrongTypeError(field_type=type_, value=data)
+        return data
+
+    return load
+
+
+def _union_loader(type_: Any, args: tuple) -> Loader:
+    # the first member type that the data matches, in declaration order
+    loaders = [_type_loader(arg) for arg in args if arg is not type(None)]
+    optional = type(None) in args
+
+    def load(data: Any) -> Any:
+        if data is None and optional:
+            return None
+        for loader in loaders:
+            try:
+                return loader(data)
+            except DaciteError:
+                pass
+        raise UnionMatchError(field_type=type_, value=data)
+
+    return load
+
+
+def _literal_loader(type_: Any, args: tuple) -> Loader:
+    def load(data: Any) -> Any:
+        if data not in args:
+            raise WrongTypeError(field_type=type_, value=data)
+        return data
+
+    return load
+
+
+def _list_loader(type_: Any, item_loader: Loader) -> Loader:
+    def load(data: Any) -> Any:
+        if not isinstance(data, list):
+            raise WrongTypeError(field_type=type_, value=data)
+        return [item_loader(item) for item in data]
+
+    return load
+
+
+def _tuple_loader(type_: Any, args: tuple) -> Loader:
+    # lists are cast to tuples
+    if len(args) == 2 and args[1] is ...:
+        item_loader = _type_loader(args[0])
+        item_loaders = None
+    else:
+        item_loaders = [_type_loader(arg) for arg in args]
+
+    def load(data: Any) -> Any:
+        if not isinstance(data, list | tuple) or (item_loaders is not None and len(data) != len(item_loaders)):
+            raise WrongTypeError(field_type=type_, value=data)
+        if item_loaders is None:
+            return tuple(item_loader(item) for item in data)
+        return tuple(loader(item) for loader, item in zip(item_loaders, data, strict=True))
+
+    return load
+
+
+def _dict_loader(type_: Any, key_loader: Loader, value_loader: Loader) -> Loader:
+    # the dict is copied, as dacite does, so that the object does not share it with the data
+    def load(data: Any) -> Any:
+        if not isinstance(data, Mapping):
+            raise WrongTypeError(field_type=type_, value=data)
+        return {key_loader(key): value_loader(value) for key, value in data.items()}
+
+    return load
@@ -3,37 +3,46 @@ This module contains base classes (some of which are abstract) common to both **
 **Ground Motion Model (GMM)** logic trees.
 """
 
-import copy
-import json
-from abc import ABC
-from collections.abc import Generator, Iterator
-from dataclasses import asdict, dataclass, field, fields
-from functools import reduce
-from itertools import product
-from operator import mul
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Generator, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import InitVar, asdict, dataclass, field, fields
+from functools import cache
+from itertools import islice, product
 from pathlib import Path
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Literal, TextIO, TypeVar, cast, get_args, get_type_hints
 
-import dacite
+import numpy as np
+import numpy.typing as npt
 
+import nzshm_model.logic_tree.composite as composite
 import nzshm_model.logic_tree.helpers as helpers
+import nzshm_model.logic_tree.json_writer as json_writer
+import nzshm_model.logic_tree.loader as loader
+import nzshm_model.logic_tree.table as table
 from nzshm_model.psha_adapter import PshaAdapterInterface
+from nzshm_model.snapshot import SnapshotReader, SnapshotWriter
 
 from .branch import Branch, BranchType, CompositeBranch
-from .correlation import LogicTreeCorrelations
+from .correlation import Correlation, LogicTreeCorrelations
 
 # TODO:
 # - move values to the base class?
-# - move logic for creating light branchSet and LogicTree when creating FilteredBranchs to
-#    the initializer of FilteredBranch?
 # - FilteredBranch doesn't need to be a data class as it should not be serialized and doesn't contain many arguments
 # - should we use FilteredBranch for correlation so the branches can be traced back to the BranchSet?
 
 # https://github.com/python/mypy/issues/8495
 # This can be done more simply with typing.Self in python3.11+
 LogicTreeType = TypeVar("LogicTreeType", bound="LogicTree")
-BranchSetType = TypeVar("BranchSetType", bound="BranchSet")
 FilteredBranchType = TypeVar("FilteredBranchType", bound="FilteredBranch")
+ResultType = TypeVar("ResultType")
+
+ValidationPolicy = Literal['eager', 'lazy', 'off']
+
+# the fields of LogicTree that snapshots store in arrays of their own
+_BASE_FIELDS = ('title', 'version', 'branch_sets', 'correlations')
 
 
 @dataclass
@@ -60,16 +69,8 @@ class BranchSet(Generic[BranchType]):
         string += '======BRANCHES======\n'
         return string + '\n'.join([str(branch) for branch in self])
 
-    def __iter__(self: BranchSetType) -> BranchSetType:
-        self.__counter = 0
-        return self
-
-    def __next__(self) -> BranchType:
-        if self.__counter >= len(self.branches):
-            raise StopIteration
-        else:
-            self.__counter += 1
-            return self.branches[self.__counter - 1]
+    def __iter__(self) -> Iterator[BranchType]:
+        return iter(self.branches)
 
 
 @dataclass
@@ -84,6 +85,9 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         version: version string
         branch_sets: list of branch sets that make up the logic tree
         correlations: any correlations between branches of the branch_sets
+        validate: when to check that the composite branch weights sum to 1.0. `'eager'` checks on creation and
+            when correlations are set, `'lazy'` checks when composite branches are first used and `'off'` never
+            checks. Not serialised.
 
     """
 
@@ -91,15 +95,33 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
     version: str = ''
     branch_sets: list[Any] = field(default_factory=list)
     correlations: LogicTreeCorrelations = field(default_factory=LogicTreeCorrelations)
+    validate: InitVar[ValidationPolicy] = 'eager'
 
-    def __post_init__(self) -> None:
+    def __post_init__(self, validate: ValidationPolicy) -> None:
         # TODO: branch set short_names should be unique (see from_branches())
-        helpers._validate_correlation_weights(self)
+        if validate not in get_args(ValidationPolicy):
+            raise ValueError(f"validate must be one of {get_args(ValidationPolicy)}, not {validate!r}")
+        self._validation = validate
+        self._weights_validated = False
+        if validate == 'eager':
+            self._validate_weights()
 
     def __setattr__(self, __name: str, __value: Any) -> None:
         super().__setattr__(__name, __value)
-        if __name == "correlations":
-            helpers._validate_correlation_weights(self)
+        # correlations are first set during __init__, before the validation policy is known
+        if __name == "correlations" and hasattr(self, '_validation'):
+            self._weights_validated = False
+            if self._validation == 'eager':
+                self._validate_weights()
+
+    def _validate_weights(self) -> None:
+        helpers._validate_correlation_weights(self)
+        self._weights_validated = True
+
+    def _check_weights(self) -> None:
+        """Validate the weights if validation was deferred by the 'lazy' policy."""
+        if self._validation == 'lazy' and not self._weights_validated:
+            self._validate_weights()
 
     def __str__(self) -> str:
         string = f'LogicTree type: {type(self)}\n'
@@ -123,25 +145,276 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         """
         Yields all composite (combined) branches of the branch_sets enforcing correlations.
 
+        Correlations are compiled into constraints, so combinations of branches that break a correlation are
+        never generated.
+
         Returns:
             composite_branches: the CompositeBranches of the combined logic tree BranchSets
         """
-        for composite_branch in self._composite_branches():
-            # if the comp_branch contains a branch listed as the 0th element of the correlations, only
-            # yeild if the other branches are present
-            # weight is automatically calculated by CompositeBranch if not explicitly assigned
-            # (as we would with correlations)
-            correlation_match = [branch_pri in composite_branch for branch_pri in self.correlations.primary_branches()]
-            if any(correlation_match):
-                # index of the correlation that matches a branch in _composite_branches()
-                i_cor = correlation_match.index(True)
-                if not all(br in composite_branch for br in self.correlations[i_cor].all_branches):
-                    continue
-                weights = [self.correlations[i_cor].weight] + [
-                    branch.weight for branch in composite_branch if branch not in self.correlations[i_cor].all_branches
-                ]
-                composite_branch.weight = reduce(mul, weights, 1.0)
-            yield composite_branch
+        self._check_weights()
+        for indices, weight in self.composite_space():
+            yield self._composite_branch(indices, weight)
+
+    def _composite_branch(self, indices: tuple[int, ...], weight: float) -> CompositeBranch:
+        composite_branch = CompositeBranch(
+            branches=tuple(self.branch_sets[i_set].branches[i_branch] for i_set, i_branch in enumerate(indices))
+        )
+        # weight is automatically calculated by CompositeBranch, but not for correlated branches
+        composite_branch.weight = weight
+        return composite_branch
+
+    def composite_space(self) -> composite.CompositeSpace:
+        """
+        Get the index-space description of the composite branches enforcing correlations.
+
+        The CompositeSpace is a snapshot of the current branch sets and correlations; hold on to it when
+        accessing many composite branches by index.
+
+        Returns:
+            the composite space
+        """
+        return composite.CompositeSpace.from_logic_tree(self)
+
+    @property
+    def num_composite_branches(self) -> int:
+        """
+        The number of composite branches enforcing correlations, computed without enumerating them.
+
+        Returns:
+            the number of composite branches
+        """
+        return len(self.composite_space())
+
+    def composite_branch_at(self, index: int) -> CompositeBranch:
+        """
+        Get a composite branch by its position in `composite_branches`, without iterating.
+
+        Parameters:
+            index: position of the composite branch, negative values count from the end
+
+        Raises:
+            IndexError: if the index is out of range
+
+        Returns:
+            the composite branch
+        """
+        self._check_weights()
+        space = self.composite_space()
+        indices = space.indices_at(index)
+        return self._composite_branch(indices, space.weight(indices))
+
+    def top_composites(self, k: int) -> list[CompositeBranch]:
+        """
+        Get the k heaviest composite branches enforcing correlations, without enumerating them all.
+
+        The composite branches are found by a best-first search (see `CompositeSpace.iter_by_weight()`), visiting
+        only the combinations next to those returned.
+
+        Parameters:
+            k: the number of composite branches
+
+        Returns:
+            up to k CompositeBranches, by decreasing weight. Equal weights are in `composite_branches` order.
+        """
+        self._check_weights()
+        return [
+            self._composite_branch(indices, weight)
+            for indices, weight in islice(self.composite_space().iter_by_weight(), max(k, 0))
+        ]
+
+    def composite_branches_above(self, min_weight: float) -> tuple[list[CompositeBranch], float]:
+        """
+        Get the composite branches enforcing correlations that weigh at least min_weight.
+
+        Sub-trees of the branch set product that cannot reach min_weight are pruned without being enumerated (see
+        `CompositeSpace.iter_above()`). The weights are not renormalised; divide by the retained weight to do so.
+
+        Parameters:
+            min_weight: the smallest weight of a composite branch to keep
+
+        Returns:
+            composite_branches: the CompositeBranches, in `composite_branches` order
+            retained_weight: the total weight of the composite branches
+        """
+        self._check_weights()
+        composite_branches = []
+        retained_weight = 0.0
+        for indices, weight in self.composite_space().iter_above(min_weight):
+            composite_branches.append(self._composite_branch(indices, weight))
+            retained_weight += weight
+        return composite_branches, retained_weight
+
+    def sample(self, n: int, seed: int | np.random.Generator | None = None) -> list[CompositeBranch]:
+        """
+        Draw composite branches enforcing correlations at random, in proportion to their weights.
+
+        Draws are made with replacement. Use `sample_composite_weights()` to get the branch indices without building
+        CompositeBranch objects.
+
+        Parameters:
+            n: the number of composite branches to draw
+            seed: a seed or random number generator, for reproducible draws
+
+        Returns:
+            the CompositeBranches drawn, with their weights
+        """
+        weights, indices = self.sample_composite_weights(n, seed)
+        return [
+            self._composite_branch(tuple(row), weight)
+            for row, weight in zip(indices.tolist(), weights.tolist(), strict=True)
+        ]
+
+    def sample_composite_weights(
+        self, n: int, seed: int | np.random.Generator | None = None
+    ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.intp]]:
+        """
+        Draw composite branches enforcing correlations at random, in proportion to their weights, with NumPy.
+
+        See `CompositeSpace.sample()`. Draws are made with replacement.
+
+        Parameters:
+            n: the number of composite branches to draw
+            seed: a seed or random number generator, for reproducible draws
+
+        Returns:
+            weights: weight of each composite branch drawn, shape (n,)
+            indices: index of the branch taken from each branch set, shape (n, len(branch_sets))
+        """
+        self._check_weights()
+        return self.composite_space().sample(n, np.random.default_rng(seed))
+
+    def iter_composite_shard(self, shard: int, n_shards: int) -> Generator[CompositeBranch, None, None]:
+        """
+        Yields one shard of the composite branches enforcing correlations.
+
+        Shards are contiguous, near-equal ranges of `composite_branches`, so concatenating shards 0 to n_shards - 1
+        reproduces its order. Branches before the shard are skipped without being enumerated.
+
+        Parameters:
+            shard: the shard to yield, from 0 to n_shards - 1
+            n_shards: the number of shards
+
+        Raises:
+            ValueError: if the shard is not in range
+
+        Returns:
+            composite_branches: the CompositeBranches in the shard
+        """
+        if not 0 <= shard < n_shards:
+            raise ValueError(f"shard must be in the range 0 to {n_shards - 1}")
+        size = self.num_composite_branches
+        yield from self.iter_composite_range(shard * size // n_shards, (shard + 1) * size // n_shards)
+
+    def iter_composite_range(self, start: int, stop: int | None = None) -> Generator[CompositeBranch, None, None]:
+        """
+        Yields the composite branches enforcing correlations at positions start to stop (exclusive).
+
+        Positions are those of `composite_branches`. Branches before start are skipped without being enumerated.
+
+        Parameters:
+            start: position of the first composite branch
+            stop: position after the last composite branch, defaults to the number of composite branches
+
+        Returns:
+            composite_branches: the CompositeBranches in the range
+        """
+        self._check_weights()
+        space = self.composite_space()
+        for indices, weight in space.iter_range(start, len(space) if stop is None else stop):
+            yield self._composite_branch(indices, weight)
+
+    def map_composites(
+        self,
+        func: Callable[[CompositeBranch], ResultType],
+        workers: int | None = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[ResultType]:
+        """
+        Apply a function to every composite branch using a pool of processes.
+
+        The composite branches are split into chunks of consecutive branches and results are streamed back a chunk
+        at a time, in the same order as `composite_branches`. The logic tree is sent to each worker process once.
+        At most two chunks per worker are queued or held at a time, and closing the iterator early cancels the
+        chunks not yet started.
+
+        Parameters:
+            func: the function to apply, it must be picklable (e.g. a module level function)
+            workers: the number of worker processes, defaults to the number of CPUs. If 1, no pool is used.
+            chunk_size: the number of composite branches handled by a worker at a time
+
+        Returns:
+            the result of func for each composite branch
+        """
+        self._check_weights()
+        if workers == 1:
+            yield from map(func, self.composite_branches)
+            return
+
+        size = self.num_composite_branches
+        ranges = ((start, min(start + chunk_size, size)) for start in range(0, size, chunk_size))
+        window = 2 * (workers or os.cpu_count() or 1)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_map_worker, initargs=(self, func))
+        try:
+            pending = deque(pool.submit(_map_range, start, stop) for start, stop in islice(ranges, window))
+            while pending:
+                chunk = pending.popleft().result()
+                pending.extend(pool.submit(_map_range, start, stop) for start, stop in islice(ranges, 1))
+                yield from chunk
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def composite_weights(self) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.intp]]:
+        """
+        Compute the weights of all composite branches enforcing correlations, without building
+        CompositeBranch objects.
+
+        Returns:
+            weights: weight of each composite branch, shape (n,)
+            indices: index of the branch taken from each branch set, shape (n, len(branch_sets)).
+                Rows are in the same order as `composite_branches`.
+        """
+        self._check_weights()
+        return composite.composite_weights(self)
+
+    def to_table(self) -> np.ndarray:
+        """
+        Export the composite branches enforcing correlations as a NumPy structured array.
+
+        There is a row per composite branch, with the branch index, registry hash digest and `branch_id` of each
+        branch set and the composite branch weight (see `nzshm_model.logic_tree.table`).
+
+        Returns:
+            the table, rows in `composite_branches` order
+        """
+        return np.concatenate([np.empty(0, dtype=table.composite_table_dtype(self)), *self.table_chunks()])
+
+    def table_chunks(self, chunk_size: int = 100_000) -> Iterator[np.ndarray]:
+        """
+        Export the composite branches enforcing correlations as NumPy structured arrays, a chunk of rows at a time.
+
+        Parameters:
+            chunk_size: the number of rows in each chunk
+
+        Returns:
+            the chunks of `to_table()`
+        """
+        self._check_weights()
+        return table.composite_table_chunks(self, chunk_size)
+
+    def to_parquet(self, path: Path | str, chunk_size: int = 100_000) -> Path:
+        """
+        Write the `to_table()` table to a Parquet file, a chunk of rows at a time.
+
+        Requires the optional `pyarrow` dependency.
+
+        Parameters:
+            path: the file path
+            chunk_size: the number of rows in each chunk (row group)
+
+        Returns:
+            the path of the file written
+        """
+        return table.write_parquet(self.table_chunks(chunk_size), table.composite_table_dtype(self), path)
 
     @classmethod
     def from_json(cls: type[LogicTreeType], json_path: Path | str) -> LogicTreeType:
@@ -157,9 +430,7 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         Returns:
             logic_tree
         """
-        with Path(json_path).open() as jsonfile:
-            data = json.load(jsonfile)
-        return cls.from_dict(data)
+        return cls.from_dict(loader.load_json(json_path))
 
     @classmethod
     def from_dict(cls: type[LogicTreeType], data: dict) -> LogicTreeType:
@@ -193,15 +464,16 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         """
         Create LogicTree object from dict. Input dict must be a direct asdict() serialisation of the LogicTree object
 
+        The objects are built by the compiled loaders of the `loader` module, which validate the data as
+        `dacite.from_dict` with `Config(strict=True, cast=[tuple])` does.
+
         Parameters:
             data: dict representation of LogicTree object
 
         Returns:
             logic_tree
         """
-
-        config = dacite.Config(strict=True, cast=[tuple])
-        return dacite.from_dict(data_class=cls, data=data, config=config)
+        return loader.from_dict(cls, data)
 
     def _to_dict(self) -> dict[str, Any]:
         """
@@ -230,87 +502,208 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         data["correlations"] = helpers._serialise_correlations(self)
         return data
 
-    def to_json(self, file_path: Path | str) -> None:
+    def to_json(self, file_path: Path | str, indent: int | None = 2) -> None:
         """Serialze logic tree as json file.
 
+        The file is written a branch at a time (see the `json_writer` module), as `json.dump(self.to_dict())` would
+        write it.
+
         Parameters:
             file_path: path to json file to be written
+            indent: the number of spaces to indent nested items by, or None for compact json
         """
         file_path = Path(file_path)
         with file_path.open('w') as jsonfile:
-            json.dump(self.to_dict(), jsonfile, indent=2)
+            self.write_json(jsonfile, indent=indent)
 
-    def __all_branches__(self) -> Generator[FilteredBranchType, None, None]:
+    def write_json(self, file: TextIO, indent: int | None = 2) -> None:
+        """Serialise logic tree as json to a text file or stream, a branch at a time.
+
+        Parameters:
+            file: the file (or stream, e.g. `sys.stdout`) to write to
+            indent: the number of spaces to indent nested items by, or None for compact json
         """
-        Yield all branches from all BranchSets, each with a shallow copy of its LogicTree and BranchSet parents
-        for use in filtering.
+        json_writer.write_json(self, file, indent=indent)
 
-        NB this class is never used for serialising models.
+    def to_snapshot(self) -> bytes:
         """
+        Serialise the logic tree as a compact binary snapshot (see the `nzshm_model.snapshot` module).
 
-        def get_fields(obj):
-            return {
-                field.name: copy.deepcopy(getattr(obj, field.name))
-                for field in fields(obj)
-                if field.name not in ('branches', 'branch_sets')
-            }
+        The snapshot keeps the validation policy and state of the logic tree, so that loading it does not validate
+        the weights again.
+
+        Returns:
+            the snapshot bytes
+
+        Raises:
+            ValueError: if a correlated branch is not in the logic tree
+        """
+        writer = SnapshotWriter(type(self).__name__)
+        writer.array('tree.strings', [writer.string(self.title), writer.string(self.version)], np.int64)
+        writer.array('tree.validation', [writer.string(self._validation), self._weights_validated], np.int64)
+        # fields added by subclasses, e.g. the logic_tree_version of a source logic tree
+        extra_fields = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in _BASE_FIELDS}
+        writer.array('tree.fields', [writer.value(extra_fields)], np.int64)
+        writer.array('set.short_name', [writer.string(bs.short_name) for bs in self.branch_sets], np.int64)
+        writer.array('set.long_name', [writer.string(bs.long_name) for bs in self.branch_sets], np.int64)
+        writer.array('set.size', [len(bs.branches) for bs in self.branch_sets], np.int64)
+
+        branches = [branch for branch_set in self.branch_sets for branch in branch_set.branches]
+        writer.array('branch.branch_id', [writer.string(branch.branch_id) for branch in branches], np.int64)
+        writer.array('branch.weight', [branch.weight for branch in branches], np.float64)
+        self._snapshot_branches(writer, branches)
+
+        set_offsets = np.cumsum([0] + [len(branch_set.branches) for branch_set in self.branch_sets]).tolist()
+        locator = composite.BranchLocator(self)
+
+        def branch_index(branch: Branch) -> int:
+            position = locator.position(branch)
+            if position is None:
+                raise ValueError(f"correlated branch {branch.branch_id} is not in the logic tree")
+            return set_offsets[position[0]] + position[1]
+
+        groups = self.correlations.correlation_groups
+        writer.index_lists('correlation.branches', ([branch_index(b) for b in cor.all_branches] for cor in groups))
+        weights = [cor.primary_branch.weight if cor.weight is None else cor.weight for cor in groups]
+        writer.array('correlation.weight', weights, np.float64)
+        return writer.to_bytes()
+
+    @classmethod
+    def from_snapshot(cls: type[LogicTreeType], data: bytes) -> LogicTreeType:
+        """
+        Create a LogicTree object from a snapshot made by `to_snapshot()`, without validating it again.
+
+        Parameters:
+            data: the snapshot bytes
+
+        Returns:
+            logic_tree
 
-        lt_fields = get_fields(self)
+        Raises:
+            nzshm_model.snapshot.SnapshotError: if the data is not a valid snapshot of this class of logic tree
+        """
+        reader = SnapshotReader(data, cls.__name__)
+        title, version = (reader.strings[i] for i in reader.array('tree.strings').tolist())
+        validation, weights_validated = reader.array('tree.validation').tolist()
+        extra_fields = reader.value(int(reader.array('tree.fields')[0]))
+
+        branch_ids = [reader.strings[i] for i in reader.array('branch.branch_id').tolist()]
+        branches = cls._branches_from_snapshot(reader, branch_ids, reader.array('branch.weight').tolist())
+
+        branch_set_class = _branch_set_class(cls)
+        branch_sets = []
+        start = 0
+        for short_name, long_name, size in zip(
+            reader.array('set.short_name').tolist(),
+            reader.array('set.long_name').tolist(),
+            reader.array('set.size').tolist(),
+            strict=True,
+        ):
+            branch_sets.append(
+                branch_set_class(
+                    short_name=reader.strings[short_name],
+                    long_name=reader.strings[long_name],
+                    branches=branches[start : start + size],
+                )
+            )
+            start += size
+
+        logic_tree = cls(title=title, version=version, validate='off', **extra_fields)
+        logic_tree.branch_sets = branch_sets
+        logic_tree.correlations = LogicTreeCorrelations(
+            [
+                Correlation(
+                    primary_branch=branches[primary],
+                    associated_branches=[branches[i] for i in associated],
+                    weight=weight,
+                )
+                for (primary, *associated), weight in zip(
+                    reader.index_lists('correlation.branches'), reader.array('correlation.weight').tolist(), strict=True
+                )
+            ]
+        )
+        logic_tree._validation = cast(ValidationPolicy, reader.strings[validation])
+        logic_tree._weights_validated = bool(weights_validated)
+        return logic_tree
+
+    @abstractmethod
+    def _snapshot_branches(self, writer: SnapshotWriter, branches: list[Any]) -> None:
+        """Add the arrays of the fields specific to the branch class to a snapshot."""
+        pass
+
+    @classmethod
+    @abstractmethod
+    def _branches_from_snapshot(cls, reader: SnapshotReader, branch_ids: list[str], weights: list[float]) -> list[Any]:
+        """Create the branches of a snapshot from their ids, weights and the arrays of `_snapshot_branches()`."""
+        pass
+
+    def __all_branches__(self) -> Generator[FilteredBranchType, None, None]:
+        """
+        Yield all branches from all BranchSets, each as a FilteredBranch view that refers to its LogicTree and
+        BranchSet parents for use in filtering.
+
+        NB this class is never used for serialising models.
+        """
         for branch_set in self.branch_sets:
-            bs_fields = get_fields(branch_set)
             for branch in branch_set.branches:
-                bs_lite = type(branch_set)(**bs_fields, branches=[type(branch)()])
-                lt_lite = type(self)(**lt_fields)
-                # b_fields = get_fields(branch)
-                yield branch.filtered_branch(
-                    branch_set=bs_lite,
-                    logic_tree=lt_lite,
-                )
+                yield branch.filtered_branch(logic_tree=self, branch_set=branch_set)
 
     @classmethod
-    def from_branches(cls, branches: Iterator[FilteredBranchType]) -> 'LogicTree':
+    def from_branches(cls, branches: Iterator[FilteredBranchType], validate: ValidationPolicy = 'off') -> 'LogicTree':
         """
         Build a complete LogicTree from a iterable of branches.
 
-        We expect that all the branches have come from a single LogicTree.
+        We expect that all the branches have come from a single LogicTree. Branch sets are matched by `short_name`
+        and the correlations of the original LogicTree are kept where all of their branches are present.
 
         Parameters:
             branches: the branches used to build the LogicTree
+            validate: the validation policy of the new LogicTree. Defaults to `'off'` as the weights of a filtered
+                LogicTree do not generally sum to 1.0.
         """
-
-        def match_branch_set(slt: LogicTree, fb):
-            for branch_set in slt.branch_sets:
-                if fb.branch_set.short_name == branch_set.short_name:
-                    return branch_set
-
         version = None
+        title = None
+        parents: dict[int, LogicTree] = {}
+        branch_sets: dict[str, BranchSet] = {}
+        present: set[Branch] = set()
         for fb in branches:
-            # ensure an slt
             if version is None:
-                logic_tree = cls(version=fb.logic_tree.version, title=fb.logic_tree.title)
                 version = fb.logic_tree.version
+                title = fb.logic_tree.title
             else:
                 assert version == fb.logic_tree.version
+            parents.setdefault(id(fb.logic_tree), fb.logic_tree)
 
-            # ensure an branch_set
-            bs = match_branch_set(logic_tree, fb)
-            if not bs:
+            # ensure a branch_set
+            bs = branch_sets.get(fb.branch_set.short_name)
+            if bs is None:
                 bs = type(fb.branch_set)(short_name=fb.branch_set.short_name, long_name=fb.branch_set.long_name)
-                logic_tree.branch_sets.append(bs)
-            bs.branches.append(fb.to_branch())
-        return logic_tree
-
-    def __iter__(self):
-        self.__current_branch = 0
-        self.__branch_list = list(self.__all_branches__())
-        return self
+                branch_sets[bs.short_name] = bs
+            branch = fb.to_branch()
+            bs.branches.append(branch)
+            present.add(branch)
+
+        correlation_groups = [
+            correlation
+            for parent in parents.values()
+            for correlation in parent.correlations
+            if all(branch in present for branch in correlation.all_branches)
+        ]
+        return cls(
+            version=version or '',
+            title=title or '',
+            branch_sets=list(branch_sets.values()),
+            correlations=LogicTreeCorrelations(correlation_groups),
+            validate=validate,
+        )
+
+    def __iter__(self) -> Iterator[FilteredBranchType]:
+        """
+        Iterate lazily over the filtered branches of all BranchSets (see `__all_branches__`).
 
-    def __next__(self) -> FilteredBranchType:
-        if self.__current_branch >= len(self.__branch_list):
-            raise StopIteration
-        else:
-            self.__current_branch += 1
-            return self.__branch_list[self.__current_branch - 1]
+        Each call returns an independent iterator, so nested and concurrent iteration is safe.
+        """
+        return self.__all_branches__()
 
     def psha_adapter(self, provider: type[PshaAdapterInterface], **kwargs: dict | None) -> "PshaAdapterInterface":
         """get a PSHA adapter for this instance.
@@ -325,22 +718,80 @@ class LogicTree(ABC, Generic[FilteredBranchType]):
         return provider(target=self)
 
 
+@cache
+def _branch_set_class(logic_tree_class: type[LogicTree]) -> type[BranchSet]:
+    # the class of the branch sets of a logic tree class, from its annotation
+    return get_args(get_type_hints(logic_tree_class)['branch_sets'])[0]
+
+
+# state of a map_composites worker process
+_map_worker: dict[str, Any] = {}
+
+
+def _init_map_worker(logic_tree: LogicTree, func: Callable[[CompositeBranch], Any]) -> None:
+    _map_worker.update(logic_tree=logic_tree, space=logic_tree.composite_space(), func=func)
+
+
+def _map_range(start: int, stop: int) -> list[Any]:
+    logic_tree, space, func = _map_worker['logic_tree'], _map_worker['space'], _map_worker['func']
+    return [func(logic_tree._composite_branch(indices, weight)) for indices, weight in space.iter_range(start, stop)]
+
+
 @dataclass
 class FilteredBranch(Branch):
     """
     A branch type that points back to it's logic tree and branch set. Should never be serialized, only
     used for filtering
+
+    Filtered branches created by iterating a LogicTree are views: logic_tree and branch_set are the parent
+    objects themselves (not copies) and the branch attributes refer to those of the original branch. Reassigning an
+    attribute of a view does not change the original branch, but is kept by `to_branch()`.
     """
 
-    logic_tree: LogicTree = field(default_factory=LogicTree)
-    branch_set: BranchSet = field(default_factory=BranchSet)
+    logic_tree: LogicTree = field(default_factory=LogicTree, repr=False)
+    branch_set: BranchSet = field(default_factory=BranchSet, repr=False)
+    _branch: Branch | None = field(default=None, init=False, repr=False, compare=False)
+
+    __hash__ = Branch.__hash__
+
+    @classmethod
+    def from_branch(
+        cls: type[FilteredBranchType], branch: Branch, logic_tree: LogicTree, branch_set: BranchSet
+    ) -> FilteredBranchType:
+        """
+        Create a view of a branch that refers to its logic tree and branch set.
+
+        Parameters:
+            branch: the branch
+            logic_tree: the logic tree that the branch belongs to
+            branch_set: the branch set that the branch belongs to
+
+        Returns:
+            the filtered branch
+        """
+        filtered_branch = cls(
+            logic_tree=logic_tree,
+            branch_set=branch_set,
+            **{branch_field.name: getattr(branch, branch_field.name) for branch_field in fields(branch)},
+        )
+        filtered_branch._branch = branch
+        return filtered_branch
 
     def to_branch(self) -> Branch:
         """
         Produce the Branch object (does not point back to it's logic tree and branch set)
 
         Returns:
-            branch: the Branch object
+            branch: the original Branch object, if the filtered branch is a view whose attributes have not been
+                reassigned, otherwise a new Branch with the attributes of the filtered branch
         """
-        branch_attributes = {k: v for k, v in self.__dict__.items() if k not in ('branch_set', 'logic_tree')}
-        return type(self.branch_set.branches[0])(**branch_attributes)
+        original = self._branch
+        if original is not None:
+            branch_fields = fields(original)
+            if all(getattr(self, f.name) is getattr(original, f.name) for f in branch_fields):
+                return original
+            branch_type: type[Branch] = type(original)
+        else:
+            branch_type = type(self.branch_set.branches[0])
+            branch_fields = fields(branch_type)
+        return branch_type(**{branch_field.name: getattr(self, branch_field.name) for branch_field in branch_fields})
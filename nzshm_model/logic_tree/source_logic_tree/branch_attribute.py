@@ -4,9 +4,13 @@
 Branch structures used in NSHM source logic trees
 """
 
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass, field
 from typing import Any
 
+from ..composite import Position
+from .interning import FrozenSlotsState
+
 
 @dataclass
 class BranchAttributeSpec:
@@ -15,8 +19,8 @@ class BranchAttributeSpec:
     value_options: list[Any] = field(default_factory=list)
 
 
-@dataclass(frozen=True)
-class BranchAttributeValue:
+@dataclass(frozen=True, slots=True)
+class BranchAttributeValue(FrozenSlotsState):
     name: str
     long_name: str
     value: Any = None
@@ -32,3 +36,164 @@ class BranchAttributeValue:
 
     def __repr__(self):
         return f"{self.name}{self.value}"
+
+
+class BranchAttributeIndex:
+    """
+    An inverted index of the attribute values of the branches in a list of branch sets.
+
+    Maps each `(name, value)` pair to the positions of the branches with that value, where a position is the
+    `(branch set index, branch index)` of the branch. List values, such as bN pairs, are indexed as tuples.
+
+    The index is a snapshot; it does not follow later changes to the branch sets.
+
+    Arguments:
+        branch_sets: the branch sets to index. Branch sets need a `short_name` and `branches`, and branches need
+            `values` and a `weight`.
+    """
+
+    def __init__(self, branch_sets: Sequence[Any]):
+        self._set_indices: dict[str, int] = {}
+        for i_set, branch_set in enumerate(branch_sets):
+            self._set_indices.setdefault(branch_set.short_name, i_set)
+        self._sizes = [len(branch_set.branches) for branch_set in branch_sets]
+        self._weights = [[branch.weight for branch in branch_set.branches] for branch_set in branch_sets]
+        self._long_names: dict[str, str] = {}
+        self._positions: dict[str, dict[Any, list[Position]]] = {}
+        for i_set, branch_set in enumerate(branch_sets):
+            for i_branch, branch in enumerate(branch_set.branches):
+                for value in branch.values:
+                    self._long_names.setdefault(value.name, value.long_name)
+                    by_value = self._positions.setdefault(value.name, {})
+                    by_value.setdefault(self.hashable(value.value), []).append((i_set, i_branch))
+
+    @staticmethod
+    def hashable(value: Any) -> Any:
+        """The value as it is indexed; lists are converted to tuples."""
+        return tuple(value) if isinstance(value, list) else value
+
+    @property
+    def names(self) -> list[str]:
+        """The attribute names, in the order they were first found."""
+        return list(self._positions)
+
+    def long_name(self, name: str) -> str:
+        """The long name of an attribute (the first found)."""
+        return self._long_names[name]
+
+    def branch_set_index(self, short_name: str) -> int:
+        """
+        The index of a branch set.
+
+        Raises:
+            ValueError: if there is no branch set with the short name
+        """
+        try:
+            return self._set_indices[short_name]
+        except KeyError:
+            raise ValueError(f"branch set {short_name} is not in the index") from None
+
+    def positions(self, name: str, value: Any, branch_set: str | None = None) -> list[Position]:
+        """
+        The positions of the branches with an attribute value.
+
+        Parameters:
+            name: the attribute name
+            value: the attribute value
+            branch_set: the short name of a branch set to restrict the positions to
+
+        Returns:
+            the `(branch set index, branch index)` positions, in branch order
+        """
+        positions = self._positions.get(name, {}).get(self.hashable(value), [])
+        if branch_set is None:
+            return list(positions)
+        i_set = self.branch_set_index(branch_set)
+        return [position for position in positions if position[0] == i_set]
+
+    def weights(self, name: str, value: Any, branch_set: str | None = None) -> list[float]:
+        """The weights of the branches with an attribute value, in the order of `positions()`."""
+        return [self._weights[i_set][i_branch] for i_set, i_branch in self.positions(name, value, branch_set)]
+
+    def values(self, name: str, branch_set: str | None = None) -> list[Any]:
+        """
+        The distinct values of an attribute, in the order they were first found.
+
+        Parameters:
+            name: the attribute name
+            branch_set: the short name of a branch set to restrict the values to
+
+        Returns:
+            the indexed (hashable) values
+        """
+        by_value = self._positions.get(name, {})
+        if branch_set is None:
+            return list(by_value)
+        i_set = self.branch_set_index(branch_set)
+        return [value for value, positions in by_value.items() if any(p[0] == i_set for p in positions)]
+
+    def marginal_weights(self, name: str, branch_set: str) -> dict[Any, float]:
+        """
+        The total weight of the branches of a branch set for each value of an attribute.
+
+        Branch weights are only comparable within a branch set, so marginal weights are per branch set.
+
+        Parameters:
+            name: the attribute name
+            branch_set: the short name of the branch set
+
+        Returns:
+            the summed branch weight for each value of the attribute found in the branch set
+        """
+        i_set = self.branch_set_index(branch_set)
+        marginals: dict[Any, float] = {}
+        for value, positions in self._positions.get(name, {}).items():
+            weights = [self._weights[i_set][i_branch] for j_set, i_branch in positions if j_set == i_set]
+            if weights:
+                marginals[value] = sum(weights)
+        return marginals
+
+    def match(self, values: Iterable[BranchAttributeValue], branch_set: str | None = None) -> list[Position]:
+        """
+        The positions of the branches that have all of the given attribute values.
+
+        Parameters:
+            values: the attribute values to match
+            branch_set: the short name of a branch set to restrict the positions to
+
+        Returns:
+            the matching positions, in branch order
+        """
+        branch_sets = None if branch_set is None else [branch_set]
+        return sorted(self._select(branch_sets, [(value.name, value.value) for value in values]))
+
+    def select(self, branch_sets: Iterable[str] | None = None, **criteria: Any) -> set[Position]:
+        """
+        The positions of the branches matching every criterion.
+
+        Criteria are keyed by attribute name and a set of values matches any of its members.
+
+        Parameters:
+            branch_sets: the short names of the branch sets to select from. Defaults to all branch sets.
+            **criteria: the attribute values to match, keyed by attribute name
+
+        Returns:
+            the selected positions
+
+        Raises:
+            ValueError: if a branch set short name is not in the index
+        """
+        return self._select(branch_sets, criteria.items())
+
+    def _select(self, branch_sets: Iterable[str] | None, conditions: Iterable[tuple[str, Any]]) -> set[Position]:
+        if branch_sets is None:
+            set_indices: Iterable[int] = range(len(self._sizes))
+        else:
+            set_indices = {self.branch_set_index(short_name) for short_name in branch_sets}
+        selected = {(i_set, i_branch) for i_set in set_indices for i_branch in range(self._sizes[i_set])}
+
+        for name, value in conditions:
+            options = value if isinstance(value, (set, frozenset)) else [value]
+            by_value = self._positions.get(name, {})
+            selected &= set().union(*(by_value.get(self.hashable(option), ()) for option in options))
+        return selected
@@ -1,15 +1,14 @@
-from collections.abc import Generator
 from dataclasses import dataclass, field
 from typing import Any
 
-from .branch_attribute import BranchAttributeSpec, BranchAttributeValue
+from .branch_attribute import BranchAttributeIndex, BranchAttributeSpec
 
 
 @dataclass
 class BranchSetSpec:
     short_name: str
     long_name: str
-    branches: list['BranchAttributeValue'] = field(default_factory=list)
+    branches: list[BranchAttributeSpec] = field(default_factory=list)
 
 
 @dataclass
@@ -29,38 +28,10 @@ class BranchSetBase:
     def derive_spec(self) -> BranchSetSpec:
         fslt_spec = BranchSetSpec(short_name=self.short_name, long_name=self.long_name)
 
-        options: dict[str, set] = {}
-
-        # extract unique values in to options
-        for branch in self.branches:
-            # iterate all the branches, yielding the unique  branch options
-            # print('branch', branch)
-            for value in branch.values:
-                if value.name not in options.keys():
-                    options[value.name] = set([])
-                val = value.value
-                if isinstance(val, list):  # make it hashable
-                    val = tuple(val)
-                bao = BranchAttributeValue(value.name, value.long_name, val)
-                options[value.name].add(bao)
-
-        # print(options)
-
-        def option_values(options: dict) -> Generator:
-            # boil down the options values
-            ret = {}
-            for key, opt in options.items():
-                if key not in ret:
-                    ret[key] = BranchAttributeSpec(key, list(opt)[0].long_name)
-
-                values = []
-                for val in opt:
-                    values.append(val.value)
-                ret[key].value_options = sorted(values)
-
-            for _key, bas in ret.items():
-                yield bas
-
-        fslt_spec.branches = list(option_values(options))
+        # the unique values of each attribute become its options
+        index = BranchAttributeIndex([self])
+        fslt_spec.branches = [
+            BranchAttributeSpec(name, index.long_name(name), sorted(index.values(name))) for name in index.names
+        ]
 
         return fslt_spec
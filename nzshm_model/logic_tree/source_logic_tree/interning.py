@@ -0,0 +1,78 @@
+"""
+Interning (flyweights) of the immutable records shared by the branches of source logic trees.
+
+Many branches of a source logic tree have the same attribute values and sources. Interning replaces equal records
+with one shared instance, so that a tree holds each distinct record once and comparisons of shared records
+short-circuit on identity.
+"""
+
+import copy
+from collections.abc import Hashable
+from dataclasses import fields
+from typing import Any, TypeVar, cast
+
+from nzshm_model.logic_tree.helpers import value_key
+
+RecordType = TypeVar('RecordType')
+
+
+def _field_values(instance: Any) -> tuple:
+    return tuple(getattr(instance, f.name) for f in fields(instance))
+
+
+class FrozenSlotsState:
+    """
+    Mixin giving frozen, slotted dataclasses an explicit state, as python 3.10 cannot copy or pickle them.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self) -> tuple:
+        return _field_values(self)
+
+    def __setstate__(self, state: tuple) -> None:
+        for f, value in zip(fields(cast(Any, self)), state, strict=True):
+            object.__setattr__(self, f.name, value)
+
+
+class InternPool:
+    """
+    A pool of shared instances of frozen dataclasses.
+
+    Instances of the same type with the same field values (of the same types) are interned as the first such
+    instance added to the pool. List and dict field values are compared by content; instances with other unhashable
+    field values are not interned.
+
+    Examples:
+        >>> pool = InternPool()
+        >>> a = pool.intern(BranchAttributeValue('s', 'moment rate scaling', 1.0))
+        >>> pool.intern(BranchAttributeValue('s', 'moment rate scaling', 1.0)) is a
+        True
+    """
+
+    def __init__(self) -> None:
+        self._instances: dict[Hashable, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    def intern(self, instance: RecordType, copy_new: bool = False) -> RecordType:
+        """
+        The shared instance equal to an instance.
+
+        Parameters:
+            instance: a frozen dataclass instance
+            copy_new: if the pool has no equal instance, add a deep copy of the instance rather than the instance
+                itself, so that the pool does not share mutable field values with the caller
+
+        Returns:
+            the pooled instance
+        """
+        try:
+            key = (type(instance), *(value_key(value) for value in _field_values(instance)))
+            pooled = self._instances.get(key)
+        except TypeError:
+            return instance
+        if pooled is None:
+            pooled = self._instances[key] = copy.deepcopy(instance) if copy_new else instance
+        return pooled
@@ -2,24 +2,31 @@
 Defines source logic tree structures used in NSHM.
 """
 
-import copy
 import warnings
+from collections.abc import Iterable
 from dataclasses import dataclass, field
+from typing import Any, cast
+
+import numpy as np
 
 from nzshm_model.logic_tree.correlation import Correlation, LogicTreeCorrelations
-from nzshm_model.logic_tree.logic_tree_base import Branch, BranchSet, FilteredBranch, LogicTree
+from nzshm_model.logic_tree.logic_tree_base import Branch, BranchSet, FilteredBranch, LogicTree, ValidationPolicy
+from nzshm_model.snapshot import SnapshotReader, SnapshotWriter
 
 from . import BranchAttributeValue
+from .branch_attribute import BranchAttributeIndex
 from .fault_system_branch_set import BranchSetSpec
+from .interning import FrozenSlotsState, InternPool
 from .version1 import SourceLogicTree as SourceLogicTreeV1
 
 
-@dataclass
-class InversionSource:
+@dataclass(frozen=True, slots=True)
+class InversionSource(FrozenSlotsState):
     """
     A hazard source built from an NSHM Grand Inversion experiment
 
-    Contains the specific identifiers used in NSHM Toshi API.
+    Contains the specific identifiers used in NSHM Toshi API. Sources are immutable, so that branches can share them:
+    to change a source of a branch, replace it, e.g. `branch.sources[0] = dataclasses.replace(source, nrml_id=...)`.
 
     Attributes:
         nrml_id: toshi_id for a NRML source file (needed by openquake)
@@ -38,12 +45,13 @@ class InversionSource:
     type: str = "inversion"
 
 
-@dataclass
-class DistributedSource:
+@dataclass(frozen=True, slots=True)
+class DistributedSource(FrozenSlotsState):
     """
     A gridded hazard source built from a background (off-fault) seismic rate model
 
-    Contains the specific identifiers used in NSHM Toshi API.
+    Contains the specific identifiers used in NSHM Toshi API. Sources are immutable, so that branches can share them:
+    to change a source of a branch, replace it, e.g. `branch.sources[0] = dataclasses.replace(source, nrml_id=...)`.
 
     Attributes:
         nrml_id: toshi_id for a NRML source file (needed by openquake)
@@ -56,7 +64,7 @@ class DistributedSource:
     type: str = "distributed"
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceBranch(Branch):
     """
     A source branch can contain multiple sources.
@@ -74,10 +82,15 @@ class SourceBranch(Branch):
     rupture_rate_scaling: float = 1.0
     tectonic_region_types: tuple[str, ...] = field(default_factory=tuple)
 
+    __hash__ = Branch.__hash__
+
     def __post_init__(self):
         if not isinstance(self.tectonic_region_types, tuple):
             raise TypeError("tectonic_region_types must be a tuple")
 
+    def _identity_key(self) -> tuple:
+        return (type(self), self.branch_id, self.registry_identity)
+
     def filtered_branch(self, logic_tree: 'LogicTree', branch_set: 'BranchSet') -> 'FilteredBranch':
         """get a filtered branch containing reference to parent instances.
 
@@ -88,7 +101,7 @@ class SourceBranch(Branch):
         Returns:
             a SourceFilteredBranch instance
         """
-        return SourceFilteredBranch(logic_tree=logic_tree, branch_set=branch_set, **self.__dict__)
+        return SourceFilteredBranch.from_branch(self, logic_tree=logic_tree, branch_set=branch_set)
 
     @property
     def tag(self) -> str:
@@ -155,11 +168,146 @@ class SourceLogicTree(LogicTree['SourceFilteredBranch']):
     branch_sets: list[SourceBranchSet] = field(default_factory=list)  # branch_sets for this logic tree
     logic_tree_version: int | None = 2
 
-    def __post_init__(self) -> None:
+    def __post_init__(self, validate: ValidationPolicy) -> None:
 
         # check that sources are defined correctly
         self._check_sources()
-        super().__post_init__()
+        super().__post_init__(validate)
+
+    def __setattr__(self, __name: str, __value: Any) -> None:
+        super().__setattr__(__name, __value)
+        if __name == "branch_sets":
+            self.reset_attribute_index()
+
+    @property
+    def attribute_index(self) -> BranchAttributeIndex:
+        """
+        An inverted index of the branch attribute values, built when first used.
+
+        The index is cached, and reset when `branch_sets` is assigned. Call `reset_attribute_index()` after modifying
+        the branch sets in place: adding, removing or reordering branch sets or their branches, or changing the
+        `values` or `weight` of a branch.
+
+        Returns:
+            the cached index of the branch sets
+        """
+        index = self.__dict__.get('_attribute_index_cache')
+        if index is None:
+            index = BranchAttributeIndex(self.branch_sets)
+            self._attribute_index_cache = index
+        return index
+
+    def reset_attribute_index(self) -> None:
+        """Reset the cached `attribute_index`."""
+        self.__dict__.pop('_attribute_index_cache', None)
+
+    def select(self, branch_sets: Iterable[str] | None = None, **criteria: Any) -> 'SourceLogicTree':
+        """
+        Select branches by their attribute values.
+
+        A branch is selected if it has a value for every criterion that matches. Criteria are keyed by
+        `BranchAttributeValue.name` and a set of values matches any of its members. The selection is made with a
+        cached index of the branch values rather than by testing each branch.
+
+        Examples:
+            >>> slt.select(dm="geodetic", s=1.0)
+            >>> slt.select(s={0.66, 1.0}, bN=[0.823, 2.7], branch_sets=["CRU"])
+
+        Parameters:
+            branch_sets: the short names of the branch sets to select from. Defaults to all branch sets.
+            **criteria: the attribute values to select, keyed by attribute name
+
+        Returns:
+            a new SourceLogicTree of the selected branches, built with `from_branches()`
+
+        Raises:
+            ValueError: if a branch set short name is not in the logic tree
+        """
+        selected = self.attribute_index.select(branch_sets, **criteria)
+        filtered_branches = (
+            SourceFilteredBranch.from_branch(
+                self.branch_sets[i_set].branches[i_branch], logic_tree=self, branch_set=self.branch_sets[i_set]
+            )
+            for i_set, i_branch in sorted(selected)
+        )
+        return cast('SourceLogicTree', self.from_branches(filtered_branches))
+
+    @classmethod
+    def _from_dict(cls, data: dict) -> 'SourceLogicTree':
+        logic_tree = super()._from_dict(data)
+        logic_tree.intern_records()
+        return logic_tree
+
+    def intern_records(self, pool: InternPool | None = None) -> InternPool:
+        """
+        Share one instance of each distinct branch attribute value and source among the branches.
+
+        Trees loaded with `from_dict()` (and so `from_json()`) or migrated with `from_source_logic_tree()` are
+        already interned. Pass the pool of another tree to share records between trees.
+
+        Parameters:
+            pool: the pool of shared instances. Defaults to a new pool.
+
+        Returns:
+            the pool
+        """
+        pool = InternPool() if pool is None else pool
+        for branch_set in self.branch_sets:
+            for branch in branch_set.branches:
+                branch.values = [pool.intern(value) for value in branch.values]
+                branch.sources = [pool.intern(source) for source in branch.sources]
+        return pool
+
+    def _snapshot_branches(self, writer: SnapshotWriter, branches: list[SourceBranch]) -> None:
+        value_rows = writer.records('attribute_value', [value for branch in branches for value in branch.values])
+        sources = [source for branch in branches for source in branch.sources]
+        inversion_rows = writer.records('inversion_source', [s for s in sources if isinstance(s, InversionSource)])
+        distributed_rows = writer.records(
+            'distributed_source', [s for s in sources if isinstance(s, DistributedSource)]
+        )
+        # sources are numbered by row, inversion sources first
+        n_inversion = len(set(inversion_rows.values()))
+
+        def source_row(source: DistributedSource | InversionSource) -> int:
+            if isinstance(source, InversionSource):
+                return inversion_rows[id(source)]
+            return n_inversion + distributed_rows[id(source)]
+
+        writer.index_lists('branch.values', ([value_rows[id(value)] for value in b.values] for b in branches))
+        writer.index_lists('branch.sources', ([source_row(source) for source in b.sources] for b in branches))
+        writer.index_lists(
+            'branch.tectonic_region_types', ([writer.string(trt) for trt in b.tectonic_region_types] for b in branches)
+        )
+        writer.array('branch.rupture_rate_scaling', [branch.rupture_rate_scaling for branch in branches], np.float64)
+
+    @classmethod
+    def _branches_from_snapshot(
+        cls, reader: SnapshotReader, branch_ids: list[str], weights: list[float]
+    ) -> list[SourceBranch]:
+        values = reader.records('attribute_value', BranchAttributeValue)
+        sources: list[DistributedSource | InversionSource] = [
+            *reader.records('inversion_source', InversionSource),
+            *reader.records('distributed_source', DistributedSource),
+        ]
+        return [
+            SourceBranch(
+                branch_id=branch_id,
+                weight=weight,
+                values=[values[i] for i in value_indices],
+                sources=[sources[i] for i in source_indices],
+                rupture_rate_scaling=rupture_rate_scaling,
+                tectonic_region_types=tuple(reader.strings[i] for i in trt_indices),
+            )
+            for branch_id, weight, value_indices, source_indices, trt_indices, rupture_rate_scaling in zip(
+                branch_ids,
+                weights,
+                reader.index_lists('branch.values'),
+                reader.index_lists('branch.sources'),
+                reader.index_lists('branch.tectonic_region_types'),
+                reader.array('branch.rupture_rate_scaling').tolist(),
+                strict=True,
+            )
+        ]
 
     def _check_sources(self):
         for branch in self:
@@ -191,37 +339,39 @@ class SourceLogicTree(LogicTree['SourceFilteredBranch']):
         """
 
         def index_branch(slt_v1, fslt_name, values):
-            fslt_names = [fslt.short_name for fslt in slt_v1.fault_system_lts]
-            ind_fslt = fslt_names.index(fslt_name)
-            fslt_values = [branch.values for branch in original_slt.fault_system_lts[ind_fslt].branches]
-            ind_branch = fslt_values.index(values)
-            return ind_fslt, ind_branch
+            for ind_fslt, ind_branch in index.match(values, fslt_name):
+                if slt_v1.fault_system_lts[ind_fslt].branches[ind_branch].values == values:
+                    return ind_fslt, ind_branch
+            raise ValueError(f"no branch in {fslt_name} has values {values}")
 
         if not isinstance(original_slt, SourceLogicTreeV1):
             raise ValueError(f"supplied object of {type(original_slt)} is not supported.")
         slt = SourceLogicTree(version=original_slt.version, title=original_slt.title)
+        pool = InternPool()
         for fslt in original_slt.fault_systems:
             new_fslt = SourceBranchSet(short_name=fslt.short_name, long_name=fslt.long_name)
             branch_id = 0
             for branch in fslt.branches:
                 new_branch = SourceBranch(
-                    values=copy.deepcopy(branch.values), weight=branch.weight, branch_id=str(branch_id)
+                    values=[pool.intern(value, copy_new=True) for value in branch.values],
+                    weight=branch.weight,
+                    branch_id=str(branch_id),
                 )
                 branch_id += 1
                 if branch.onfault_nrml_id:
-                    new_branch.sources.append(
-                        InversionSource(
-                            nrml_id=branch.onfault_nrml_id,
-                            inversion_id=branch.inversion_solution_id,
-                            rupture_set_id=branch.rupture_set_id,
-                        )
+                    inversion_source = InversionSource(
+                        nrml_id=branch.onfault_nrml_id,
+                        inversion_id=branch.inversion_solution_id,
+                        rupture_set_id=branch.rupture_set_id,
                     )
+                    new_branch.sources.append(pool.intern(inversion_source))
                 if branch.distributed_nrml_id:
-                    new_branch.sources.append(DistributedSource(nrml_id=branch.distributed_nrml_id))
+                    new_branch.sources.append(pool.intern(DistributedSource(nrml_id=branch.distributed_nrml_id)))
                 new_fslt.branches.append(new_branch)
             slt.branch_sets.append(new_fslt)
 
         if original_slt.correlations:
+            index = BranchAttributeIndex(original_slt.fault_system_lts)
             correlations = []
             for orig_correlation in original_slt.correlations:
                 ind_fslt0, ind_branch0 = index_branch(
@@ -274,6 +424,8 @@ class SourceFilteredBranch(FilteredBranch, SourceBranch):
     logic_tree: 'LogicTree' = field(default_factory=SourceLogicTree)
     branch_set: 'BranchSet' = field(default_factory=SourceBranchSet)
 
+    __hash__ = Branch.__hash__
+
     @property
     def fslt(self) -> 'BranchSet':
         """
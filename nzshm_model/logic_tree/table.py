@@ -0,0 +1,243 @@
+"""
+Columnar export of composite branches as NumPy structured arrays and Parquet files.
+
+A table has a row per composite branch. For each branch set, identified by its `short_name`, there are columns of the
+branch index in the branch set (`<short_name>_index`), the branch registry hash digest (`<short_name>_digest`, see
+`branch_registry.identity_digest`) and the `branch_id` (`<short_name>_branch_id`). The position of the composite
+branch (`composite_index`) and its `weight` complete the row. Hash digests are ASCII bytes in NumPy, to keep large
+tables compact, and strings in Parquet.
+
+Tables are built a chunk at a time from the branch indices of the composite branches, without creating
+CompositeBranch objects. Writing Parquet files requires the optional `pyarrow` dependency.
+"""
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from nzshm_model.branch_registry import identity_digest
+
+if TYPE_CHECKING:
+    from .logic_tree_base import LogicTree
+
+DIGEST_LENGTH = 12
+
+
+class BranchSetColumns:
+    """
+    The column values of each branch of a logic tree, for looking up by branch index.
+
+    Arguments:
+        logic_tree: the logic tree
+        prefix: prefix for the column names
+
+    Raises:
+        ValueError: if the branch set short names are not unique
+    """
+
+    def __init__(self, logic_tree: 'LogicTree', prefix: str = ''):
+        short_names = [branch_set.short_name for branch_set in logic_tree.branch_sets]
+        if len(set(short_names)) != len(short_names):
+            raise ValueError(f"branch set short names {short_names} must be unique to name table columns")
+        self.names = [f"{prefix}{short_name}" for short_name in short_names]
+        self.digests = [
+            np.array(
+                [identity_digest(getattr(branch, 'registry_identity', None) or '') for branch in branch_set.branches],
+                dtype=f'S{DIGEST_LENGTH}',
+            )
+            for branch_set in logic_tree.branch_sets
+        ]
+        self.branch_ids = [
+            np.array([branch.branch_id for branch in branch_set.branches], dtype=str)
+            for branch_set in logic_tree.branch_sets
+        ]
+
+    def dtype_fields(self) -> list[tuple[str, npt.DTypeLike]]:
+        """The names and types of the branch set columns."""
+        fields: list[tuple[str, npt.DTypeLike]] = []
+        for name, branch_ids in zip(self.names, self.branch_ids, strict=True):
+            branch_id_length = max(branch_ids.dtype.itemsize // 4, 1)
+            fields += [
+                (f"{name}_index", np.int32),
+                (f"{name}_digest", f'S{DIGEST_LENGTH}'),
+                (f"{name}_branch_id", f'U{branch_id_length}'),
+            ]
+        return fields
+
+    def fill(self, table: np.ndarray, indices: npt.NDArray[np.intp]) -> None:
+        """
+        Fill the branch set columns of a table.
+
+        Parameters:
+            table: the table to fill
+            indices: branch index in each branch set of each row, shape (len(table), number of branch sets)
+        """
+        for i_set, name in enumerate(self.names):
+            set_indices = indices[:, i_set]
+            table[f"{name}_index"] = set_indices
+            table[f"{name}_digest"] = self.digests[i_set][set_indices]
+            table[f"{name}_branch_id"] = self.branch_ids[i_set][set_indices]
+
+
+def composite_table_dtype(logic_tree: 'LogicTree') -> np.dtype:
+    """
+    The NumPy dtype of the composite branch table of a logic tree.
+
+    Parameters:
+        logic_tree: the logic tree
+
+    Returns:
+        the structured dtype
+    """
+    return _composite_dtype(BranchSetColumns(logic_tree))
+
+
+def _composite_dtype(columns: BranchSetColumns) -> np.dtype:
+    return np.dtype([('composite_index', np.int64)] + columns.dtype_fields() + [('weight', float)])
+
+
+def composite_table_chunks(logic_tree: 'LogicTree', chunk_size: int) -> Iterator[np.ndarray]:
+    """
+    Yield the composite branch table of a logic tree, enforcing correlations, in chunks of rows.
+
+    Parameters:
+        logic_tree: the logic tree
+        chunk_size: the number of rows in each chunk (the last may be shorter)
+
+    Raises:
+        ValueError: if chunk_size is less than 1
+
+    Yields:
+        structured arrays of `composite_table_dtype()`, rows in `composite_branches` order
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    columns = BranchSetColumns(logic_tree)
+    dtype = _composite_dtype(columns)
+    space = logic_tree.composite_space()
+    n_sets = len(logic_tree.branch_sets)
+    for start in range(0, len(space), chunk_size):
+        composites = list(space.iter_range(start, start + chunk_size))
+        table = np.empty(len(composites), dtype=dtype)
+        table['composite_index'] = np.arange(start, start + len(composites))
+        columns.fill(table, np.array([indices for indices, _ in composites], dtype=np.intp).reshape(-1, n_sets))
+        table['weight'] = [weight for _, weight in composites]
+        yield table
+
+
+def realization_table_dtype(source_logic_tree: 'LogicTree', gmcm_logic_tree: 'LogicTree') -> np.dtype:
+    """
+    The NumPy dtype of the realization table of a source and a GMCM logic tree.
+
+    The branch set columns are prefixed with `source_` and `gmcm_`, and the positions of the realization and of its
+    source and GMCM composite branches are in `realization_index`, `source_composite_index` and
+    `gmcm_composite_index`.
+
+    Parameters:
+        source_logic_tree: the source logic tree
+        gmcm_logic_tree: the GMCM logic tree
+
+    Returns:
+        the structured dtype
+    """
+    return _realization_dtype(
+        BranchSetColumns(source_logic_tree, prefix='source_'), BranchSetColumns(gmcm_logic_tree, prefix='gmcm_')
+    )
+
+
+def _realization_dtype(source_columns: BranchSetColumns, gmcm_columns: BranchSetColumns) -> np.dtype:
+    return np.dtype(
+        [('realization_index', np.int64), ('source_composite_index', np.int64), ('gmcm_composite_index', np.int64)]
+        + source_columns.dtype_fields()
+        + gmcm_columns.dtype_fields()
+        + [('weight', float)]
+    )
+
+
+def _composite_arrays(logic_tree: 'LogicTree') -> tuple[npt.NDArray[np.float64], npt.NDArray[np.intp]]:
+    composites = list(logic_tree.composite_space())
+    weights = np.array([weight for _, weight in composites], dtype=float)
+    indices = np.array([indices for indices, _ in composites], dtype=np.intp).reshape(-1, len(logic_tree.branch_sets))
+    return weights, indices
+
+
+def realization_table_chunks(
+    source_logic_tree: 'LogicTree', gmcm_logic_tree: 'LogicTree', chunk_size: int
+) -> Iterator[np.ndarray]:
+    """
+    Yield the realization table of a source and a GMCM logic tree in chunks of rows.
+
+    Realizations combine every source composite branch with every GMCM composite branch, in source-major order
+    (see `NshmModel.realizations()`). The composite branches of each logic tree are found once and combined by
+    index, so only a chunk of the realization table is held at a time.
+
+    Parameters:
+        source_logic_tree: the source logic tree
+        gmcm_logic_tree: the GMCM logic tree
+        chunk_size: the number of rows in each chunk (the last may be shorter)
+
+    Raises:
+        ValueError: if chunk_size is less than 1
+
+    Yields:
+        structured arrays of `realization_table_dtype()`
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    source_columns = BranchSetColumns(source_logic_tree, prefix='source_')
+    gmcm_columns = BranchSetColumns(gmcm_logic_tree, prefix='gmcm_')
+    dtype = _realization_dtype(source_columns, gmcm_columns)
+    source_weights, source_indices = _composite_arrays(source_logic_tree)
+    gmcm_weights, gmcm_indices = _composite_arrays(gmcm_logic_tree)
+
+    n_gmcm = len(gmcm_weights)
+    for start in range(0, len(source_weights) * n_gmcm, chunk_size):
+        realization_index = np.arange(start, min(start + chunk_size, len(source_weights) * n_gmcm))
+        i_source, i_gmcm = np.divmod(realization_index, n_gmcm)
+        table = np.empty(len(realization_index), dtype=dtype)
+        table['realization_index'] = realization_index
+        table['source_composite_index'] = i_source
+        table['gmcm_composite_index'] = i_gmcm
+        source_columns.fill(table, source_indices[i_source])
+        gmcm_columns.fill(table, gmcm_indices[i_gmcm])
+        table['weight'] = source_weights[i_source] * gmcm_weights[i_gmcm]
+        yield table
+
+
+def write_parquet(chunks: Iterable[np.ndarray], dtype: np.dtype, path: Path | str) -> Path:
+    """
+    Write table chunks to a Parquet file, one row group per chunk.
+
+    Parameters:
+        chunks: structured arrays of the dtype
+        dtype: the dtype of the table, used for the file schema
+        path: the file path
+
+    Raises:
+        ModuleNotFoundError: if `pyarrow` is not installed
+
+    Returns:
+        the path of the file written
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError("writing Parquet files requires the optional `pyarrow` dependency") from None
+
+    def to_arrow(table: np.ndarray) -> 'pa.Table':
+        columns = {}
+        for name in dtype.names or ():
+            column = pa.array(table[name])
+            columns[name] = column.cast(pa.string()) if dtype[name].kind == 'S' else column
+        return pa.Table.from_pydict(columns)
+
+    path = Path(path)
+    schema = to_arrow(np.empty(0, dtype=dtype)).schema
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(to_arrow(chunk).cast(schema))
+    return path
@@ -2,17 +2,28 @@
 NshmModel class describes a complete National Seismic Hazard Model.
 """
 
+import asyncio
+import hashlib
 import importlib.resources as resources
 import json
-from collections.abc import Iterator
+import threading
+import warnings
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import Executor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Generic
+from typing import Any, Generic, NamedTuple, cast
 
-from nzshm_model.logic_tree import GMCMLogicTree, SourceBranchSet, SourceLogicTree
+import numpy as np
+
+import nzshm_model.logic_tree.loader as loader
+import nzshm_model.logic_tree.table as table
+from nzshm_model.logic_tree import CompositeBranch, GMCMBranchSet, GMCMLogicTree, SourceBranchSet, SourceLogicTree
 from nzshm_model.logic_tree.source_logic_tree import SourceLogicTreeV1
 from nzshm_model.model_versions import versions
 from nzshm_model.psha_adapter import ModelPshaAdapterInterface
 from nzshm_model.psha_adapter.hazard_config_factory import hazard_config_class_factory
+from nzshm_model.snapshot import SNAPSHOT_SUFFIX, SnapshotError, SnapshotReader, SnapshotWriter
 
 from .psha_adapter.hazard_config import HazardConfig, HazardConfigType
 
@@ -22,6 +33,61 @@ SLT_SOURCE_PATH = RESOURCES_PATH / "SRM_JSON"
 GMM_JSON_SOURCE_PATH = RESOURCES_PATH / "GMM_JSON"
 GMM_SOURCE_PATH = RESOURCES_PATH / "GMM_LTs"
 HAZARD_CONFIG_PATH = RESOURCES_PATH / "HAZARD_CONFIG_JSON"
+SNAPSHOT_PATH = RESOURCES_PATH / "SNAPSHOTS"
+
+MODEL_CACHE_SIZE = 8
+
+
+class Realization(NamedTuple):
+    """
+    A realization of a model: a source composite branch combined with a GMCM composite branch.
+
+    Attributes:
+        source_branch: the source logic tree composite branch
+        gmcm_branch: the GMCM logic tree composite branch
+        weight: the weight of the realization
+        indices: the positions of the source and GMCM composite branches in the `composite_branches` of their
+            logic trees, identifying the realization
+    """
+
+    source_branch: CompositeBranch
+    gmcm_branch: CompositeBranch
+    weight: float
+    indices: tuple[int, int]
+
+
+class _Component:
+    """
+    A model component, which may be created when it is first used.
+
+    A model made with `NshmModel._deferred()` holds a function creating each component until it is used, so models
+    sharing the same (immutable) snapshot never share mutable components. Components are created under the lock of
+    the model, so that threads using a model at once create each component once.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        self.attribute = f'_{name}'
+
+    def __get__(self, model: Any, owner: type | None = None) -> Any:
+        if model is None:
+            return self
+        try:
+            return model.__dict__[self.attribute]
+        except KeyError:
+            pass
+        with model._lock:
+            try:
+                return model.__dict__[self.attribute]
+            except KeyError:
+                value = model.__dict__[self.attribute] = model._loaders[self.name]()
+                del model._loaders[self.name]
+                return value
+
+    def __set__(self, model: Any, value: Any) -> None:
+        with model._lock:
+            model.__dict__[self.attribute] = value
+            model._loaders.pop(self.name, None)
 
 
 class NshmModel(Generic[HazardConfigType]):
@@ -29,6 +95,10 @@ class NshmModel(Generic[HazardConfigType]):
     An NshmModel instance represents a complete National Seismic Hazard Model version.
     """
 
+    source_logic_tree: SourceLogicTree = cast(SourceLogicTree, _Component())
+    gmm_logic_tree: GMCMLogicTree = cast(GMCMLogicTree, _Component())
+    hazard_config: HazardConfig = cast(HazardConfig, _Component())
+
     def __init__(
         self,
         version: str,
@@ -47,6 +117,8 @@ class NshmModel(Generic[HazardConfigType]):
         """
         self.version = version
         self.title = title
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._lock = threading.RLock()
         self.hazard_config = hazard_config
         self.source_logic_tree = source_logic_tree
         self.gmm_logic_tree = gmcm_logic_tree
@@ -59,51 +131,127 @@ class NshmModel(Generic[HazardConfigType]):
         slt_json: str | Path,
         gmm_json: str | Path,
         hazard_config_json: str | Path,
+        executor: Executor | None = None,
+        lazy: bool = False,
     ) -> 'NshmModel[HazardConfigType]':
         """
         Create a new NshmModel instance from files.
 
+        Each file is read and decoded once. The source logic tree, GMCM logic tree and hazard config are built in
+        turn, or concurrently if an executor is given, or when first used if `lazy` is set. Building them is CPU
+        bound, so a thread pool only helps where the GIL does not serialise the threads (e.g. free-threaded Python
+        builds).
+
         NB library users will typically never use this, rather they will obtain a model instance
         using static method: `get_model_version`.
+
+        Examples:
+            >>> with ThreadPoolExecutor(max_workers=3) as executor:
+            ...     model = NshmModel.from_files(version, title, slt_json, gmm_json, hazard_config_json, executor)
+
+        Arguments:
+            version: Describes version of the model being developed / used.
+            title: A title for the model.
+            slt_json: path of the source logic tree json file (of the current or v1 format).
+            gmm_json: path of the GMCM logic tree json file.
+            hazard_config_json: path of the hazard config json file.
+            executor: an executor to build the components concurrently with.
+            lazy: build each component when it is first used, rather than now.
+
+        Returns:
+            the model instance.
         """
+        loaders = cls._component_loaders(slt_json, gmm_json, hazard_config_json)
+        if lazy:
+            return cls._deferred(version, title, **loaders)
+        if executor is None:
+            return cls(version, title, *(load() for load in loaders.values()))
+        futures = [executor.submit(load) for load in loaders.values()]
+        return cls(version, title, *(future.result() for future in futures))
 
-        # backwards compatatilbity for v1 SourceLogicTree
-        # v1 is not versioned
-        data = NshmModel._slt_data_from_file(slt_json)
-        if data.get("logic_tree_version") is None:
-            source_logic_tree = NshmModel._source_logic_tree_from_v1_json(slt_json)
+    @classmethod
+    async def from_files_async(
+        cls,
+        version: str,
+        title: str,
+        slt_json: str | Path,
+        gmm_json: str | Path,
+        hazard_config_json: str | Path,
+    ) -> 'NshmModel[HazardConfigType]':
+        """
+        Create a new NshmModel instance from files, as `from_files()`, without blocking the event loop.
 
-        source_logic_tree = SourceLogicTree.from_json(slt_json)
-        gmcm_logic_tree = GMCMLogicTree.from_json(gmm_json)
-        HazardConfigClass = hazard_config_class_factory.get_hazard_config_class_from_file(hazard_config_json)
-        hazard_config = HazardConfigClass.from_json(hazard_config_json)
-        return cls(version, title, source_logic_tree, gmcm_logic_tree, hazard_config)
+        The components are built concurrently in threads, so the event loop stays responsive while the files are
+        read and decoded.
+
+        Examples:
+            >>> model = await NshmModel.from_files_async(version, title, slt_json, gmm_json, hazard_config_json)
+        """
+        loaders = cls._component_loaders(slt_json, gmm_json, hazard_config_json)
+        components = await asyncio.gather(*(asyncio.to_thread(load) for load in loaders.values()))
+        return cls(version, title, *components)
 
     @staticmethod
-    def _slt_data_from_file(filepath: str | Path) -> dict[Any, Any]:
-        with Path(filepath).open('r') as jsonfile:
-            data = json.load(jsonfile)
-        return data
+    def _component_loaders(
+        slt_json: str | Path, gmm_json: str | Path, hazard_config_json: str | Path
+    ) -> dict[str, Callable[[], Any]]:
+        # functions reading and building each component, in the order of the __init__ arguments
+        return {
+            'source_logic_tree': partial(NshmModel._source_logic_tree_from_json, slt_json),
+            'gmm_logic_tree': partial(GMCMLogicTree.from_json, gmm_json),
+            'hazard_config': partial(hazard_config_class_factory.hazard_config_from_file, hazard_config_json),
+        }
+
+    @classmethod
+    def _deferred(cls, version: str, title: str, **loaders: Callable[[], Any]) -> 'NshmModel':
+        # a model whose components are created by the loaders when first used
+        model = cls.__new__(cls)
+        model.version = version
+        model.title = title
+        model._loaders = loaders
+        model._lock = threading.RLock()
+        return model
+
+    def __getstate__(self) -> dict[str, Any]:
+        # copies and pickles get their own loaders (of the components not yet created) and lock
+        with self._lock:
+            state = self.__dict__.copy()
+            state['_loaders'] = dict(self._loaders)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
 
     @staticmethod
-    def _source_logic_tree_from_v1_json(filepath: str | Path) -> SourceLogicTree:
+    def _source_logic_tree_from_json(filepath: str | Path) -> SourceLogicTree:
         """
-        Create a SourceLogicTree from an old v1 json file; convert to new type.
+        Create a SourceLogicTree from a json file of the current or the old v1 format, reading the file once.
 
         Arguments:
             filepath: the path to the json file specifying the source logic tree
 
         Returns:
             a source logic tree
-
         """
-        return SourceLogicTree.from_source_logic_tree(SourceLogicTreeV1.from_json(filepath))
+        data = loader.load_json(filepath)
+        # backwards compatibility for v1 SourceLogicTree; v1 is not versioned, and is converted to the new type
+        if data.get("logic_tree_version") is None:
+            return SourceLogicTree.from_source_logic_tree(SourceLogicTreeV1.from_dict(data))
+        return SourceLogicTree.from_dict(data)
 
     @classmethod
     def get_model_version(cls, version: str) -> 'NshmModel':
         """
         Retrieve an existing model by its specific version
 
+        The model is loaded from its prebuilt snapshot (see `version_snapshot()`) if there is one that was built
+        from the current resource files, otherwise from the resource files. The snapshots of the most recently used
+        versions are cached by version and resource file digests (see `cache_info()`), and every call returns a new
+        model from the cached snapshot, whose components are only decoded when first used. Changing a model, e.g.
+        with `hazard_config.set_sites()`, does not change the models returned by other calls.
+
         Examples:
             >>> from nzshm_model import NshmModel
             >>> model = NshmModel.get_model_version("NSHM_v1.0.4")
@@ -120,7 +268,62 @@ class NshmModel(Generic[HazardConfigType]):
         Returns:
             the model instance.
         """
+        return cls.from_snapshot(cls._cached_snapshot(version))
+
+    @classmethod
+    def get_model_manifest(cls, version: str) -> 'ModelManifest':
+        """
+        Retrieve the manifest of an existing model version, without loading the model.
+
+        The manifest is read from the cached snapshot of the version (see `get_model_version()`).
+
+        Examples:
+            >>> from nzshm_model import NshmModel
+            >>> manifest = NshmModel.get_model_manifest("NSHM_v1.0.4")
+            >>> manifest.source_branch_counts
+            (('PUY', 3), ('HIK', 9), ('CRU', 36), ('SLAB', 1))
+
+        Parameters:
+            version: The unique identifier for the model version.
+
+        Raises:
+            ValueError: when the version does not exist.
+
+        Returns:
+            the model manifest.
+        """
+        return cls.manifest_from_snapshot(cls._cached_snapshot(version))
+
+    @classmethod
+    def _cached_snapshot(cls, version: str) -> bytes:
+        # the snapshot of a model version, from the cache keyed by the digests of its current resource files
+        resource_digests = _resource_digests(cls._model_version_args(version))
+        key = hashlib.sha256(json.dumps(resource_digests, sort_keys=True).encode()).hexdigest()
+        return _cached_version_snapshot(cast(Hashable, cls), version, key)
+
+    @staticmethod
+    def cache_info() -> 'ModelCacheInfo':
+        """
+        Statistics of the cache of model version snapshots used by `get_model_version()`, `get_model_manifest()` and
+        `all_model_manifests()`.
+
+        Returns:
+            the cache hits, misses, maximum size and current size
+        """
+        info = _cached_version_snapshot.cache_info()
+        return ModelCacheInfo(info.hits, info.misses, MODEL_CACHE_SIZE, info.currsize)
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Empty the cache of model version snapshots (and of the digests of their resource files) used by
+        `get_model_version()` and the model manifests, and reset its statistics.
+        """
+        _cached_version_snapshot.cache_clear()
+        _file_digests.clear()
 
+    @staticmethod
+    def _model_version_args(version: str) -> dict[str, Any]:
         model_args_factory = versions.get(version)
         if not model_args_factory:
             raise ValueError(f"{version} is not a valid model version.")
@@ -129,7 +332,133 @@ class NshmModel(Generic[HazardConfigType]):
         model_args['slt_json'] = SLT_SOURCE_PATH / model_args['slt_json']
         model_args['gmm_json'] = GMM_JSON_SOURCE_PATH / model_args['gmm_json']
         model_args['hazard_config_json'] = HAZARD_CONFIG_PATH / model_args['hazard_config_json']
-        return cls.from_files(**model_args)
+        return model_args
+
+    @classmethod
+    def version_snapshot(cls, version: str) -> bytes:
+        """
+        Build the snapshot of a model version from its resource files, for `get_model_version()`.
+
+        Snapshots of the published versions are kept in `resources/SNAPSHOTS` as `<version>.snapshot`. They record
+        the digests of the resource files, so a snapshot is not used once the files change. Rebuild them with the
+        `model snapshot` command.
+
+        Parameters:
+            version: The unique identifier for the model version.
+
+        Raises:
+            ValueError: when the version does not exist.
+
+        Returns:
+            the snapshot bytes
+        """
+        model_args = cls._model_version_args(version)
+        return cls.from_files(**model_args).to_snapshot(resource_digests=_resource_digests(model_args))
+
+    def to_snapshot(self, resource_digests: dict[str, str] | None = None) -> bytes:
+        """
+        Serialise the model as a compact binary snapshot (see the `nzshm_model.snapshot` module).
+
+        The logic trees are embedded as their own snapshots (see `LogicTree.to_snapshot()`) and the hazard config
+        as its dict representation. The snapshot also holds the model manifest (see `manifest_from_snapshot()`).
+
+        Parameters:
+            resource_digests: digests of the files that the model was built from, checked by `from_snapshot()`
+
+        Returns:
+            the snapshot bytes
+        """
+        writer = SnapshotWriter(type(self).__name__)
+        strings = [self.version, self.title, self.hazard_config.hazard_type]
+        writer.array('model.strings', [writer.string(string) for string in strings], np.int64)
+        writer.array('model.hazard_config', [writer.value(self.hazard_config.to_dict())], np.int64)
+        writer.array('model.resource_digests', [writer.value(resource_digests)], np.int64)
+        manifest = self.manifest()
+        branch_counts = (manifest.source_branch_counts, manifest.gmcm_branch_counts)
+        writer.array('model.branch_counts', [writer.value(branch_counts)], np.int64)
+        writer.blob('model.source_logic_tree', self.source_logic_tree.to_snapshot())
+        writer.blob('model.gmcm_logic_tree', self.gmm_logic_tree.to_snapshot())
+        return writer.to_bytes()
+
+    @classmethod
+    def from_snapshot(cls, data: bytes, resource_digests: dict[str, str] | None = None) -> 'NshmModel':
+        """
+        Create a model from a snapshot made by `to_snapshot()`, without parsing or validating it again.
+
+        The logic trees and hazard config are decoded from the snapshot when they are first used.
+
+        Parameters:
+            data: the snapshot bytes
+            resource_digests: if given, the resource digests that the snapshot must have been made with
+
+        Returns:
+            the model instance.
+
+        Raises:
+            nzshm_model.snapshot.SnapshotError: if the data is not a valid model snapshot or its resource digests
+                do not match
+        """
+        reader = SnapshotReader(data, cls.__name__)
+        snapshot_digests = reader.value(int(reader.array('model.resource_digests')[0]))
+        if resource_digests is not None and snapshot_digests != resource_digests:
+            raise SnapshotError("the snapshot was made from other resource files")
+        version, title, hazard_type = (reader.strings[i] for i in reader.array('model.strings').tolist())
+        HazardConfigClass = hazard_config_class_factory.get_hazard_config_class(hazard_type)
+        return cls._deferred(
+            version,
+            title,
+            source_logic_tree=partial(SourceLogicTree.from_snapshot, reader.blob('model.source_logic_tree')),
+            gmm_logic_tree=partial(GMCMLogicTree.from_snapshot, reader.blob('model.gmcm_logic_tree')),
+            hazard_config=partial(
+                HazardConfigClass.from_dict, reader.value(int(reader.array('model.hazard_config')[0]))
+            ),
+        )
+
+    @classmethod
+    def manifest_from_snapshot(cls, data: bytes) -> 'ModelManifest':
+        """
+        Read the manifest of a model from its snapshot, without decoding the logic trees or hazard config.
+
+        Parameters:
+            data: the snapshot bytes
+
+        Returns:
+            the model manifest.
+
+        Raises:
+            nzshm_model.snapshot.SnapshotError: if the data is not a valid model snapshot
+        """
+        reader = SnapshotReader(data, cls.__name__)
+        resource_digests = reader.value(int(reader.array('model.resource_digests')[0]))
+        source_branch_counts, gmcm_branch_counts = reader.value(int(reader.array('model.branch_counts')[0]))
+        version, title, _ = (reader.strings[i] for i in reader.array('model.strings').tolist())
+        return ModelManifest(
+            version,
+            title,
+            resource_digests,
+            tuple((name, count) for name, count in source_branch_counts),
+            tuple((name, count) for name, count in gmcm_branch_counts),
+        )
+
+    def manifest(self, resource_digests: dict[str, str] | None = None) -> 'ModelManifest':
+        """
+        The manifest of the model.
+
+        Parameters:
+            resource_digests: digests of the files that the model was built from
+
+        Returns:
+            the model manifest.
+        """
+        return ModelManifest(
+            self.version,
+            self.title,
+            resource_digests,
+            tuple(
+                (branch_set.short_name, len(branch_set.branches)) for branch_set in self.source_logic_tree.branch_sets
+            ),
+            tuple((branch_set.short_name, len(branch_set.branches)) for branch_set in self.gmm_logic_tree.branch_sets),
+        )
 
     def get_source_branch_sets(self, short_names: list[str] | str | None = None) -> Iterator['SourceBranchSet']:
         """
@@ -168,6 +497,151 @@ class NshmModel(Generic[HazardConfigType]):
                 except StopIteration:
                     raise ValueError("The branch " + short_name + " was not found.") from None
 
+    def applicable_gmcm_logic_tree(self) -> GMCMLogicTree:
+        """
+        The GMCM logic tree restricted to the branch sets that apply to the source logic tree.
+
+        A GMCM branch set applies if its tectonic region type is one of the `tectonic_region_types` of the source
+        branch sets, or if it has no tectonic region type. Filtering the source logic tree therefore shrinks the
+        GMCM logic tree too.
+
+        Returns:
+            the GMCM logic tree, or a new GMCMLogicTree (see `LogicTree.from_branches()`) if any branch sets are
+            removed
+        """
+        trts = {trt for branch_set in self.source_logic_tree.branch_sets for trt in branch_set.tectonic_region_types}
+
+        def applies(branch_set: GMCMBranchSet) -> bool:
+            return not branch_set.tectonic_region_type or branch_set.tectonic_region_type in trts
+
+        if all(applies(branch_set) for branch_set in self.gmm_logic_tree.branch_sets):
+            return self.gmm_logic_tree
+        filtered_branches = (fb for fb in self.gmm_logic_tree if applies(fb.branch_set))
+        return cast(GMCMLogicTree, GMCMLogicTree.from_branches(filtered_branches))
+
+    @property
+    def num_realizations(self) -> int:
+        """
+        The number of realizations, computed without enumerating them.
+
+        Returns:
+            the number of combinations of source and applicable GMCM composite branches
+        """
+        return self.source_logic_tree.num_composite_branches * self.applicable_gmcm_logic_tree().num_composite_branches
+
+    def realizations(self, start: int = 0, stop: int | None = None) -> Iterator[Realization]:
+        """
+        Lazily yield the realizations of the model: every source composite branch combined with every composite
+        branch of the applicable GMCM logic tree (see `applicable_gmcm_logic_tree()`).
+
+        Realizations are in source-major order, so realization `i` combines source composite branch
+        `i // n_gmcm` with GMCM composite branch `i % n_gmcm`. A range of realizations can be taken for chunked
+        processing; realizations before start are skipped without being enumerated.
+
+        Examples:
+            >>> model = get_model_version("NSHM_v1.0.4")
+            >>> for source_branch, gmcm_branch, weight, indices in model.realizations(0, 1000):
+            >>>     ...
+
+        Parameters:
+            start: position of the first realization
+            stop: position after the last realization, defaults to the number of realizations
+
+        Yields:
+            the realizations in the range
+        """
+        gmcm_logic_tree = self.applicable_gmcm_logic_tree()
+        n_gmcm = gmcm_logic_tree.num_composite_branches
+        size = self.source_logic_tree.num_composite_branches * n_gmcm
+        start = max(start, 0)
+        stop = size if stop is None else min(stop, size)
+        if start >= stop:
+            return
+
+        first_source, last_source = start // n_gmcm, (stop - 1) // n_gmcm
+        source_branches = self.source_logic_tree.iter_composite_range(first_source, last_source + 1)
+        for i_source, source_branch in enumerate(source_branches, first_source):
+            gmcm_start = max(start - i_source * n_gmcm, 0)
+            gmcm_branches = gmcm_logic_tree.iter_composite_range(gmcm_start, min(stop - i_source * n_gmcm, n_gmcm))
+            for i_gmcm, gmcm_branch in enumerate(gmcm_branches, gmcm_start):
+                yield Realization(
+                    source_branch, gmcm_branch, source_branch.weight * gmcm_branch.weight, (i_source, i_gmcm)
+                )
+
+    def realization_chunks(self, chunk_size: int) -> Iterator[list[Realization]]:
+        """
+        Lazily yield the realizations of the model in lists of consecutive realizations.
+
+        Parameters:
+            chunk_size: the number of realizations in each list (the last may be shorter)
+
+        Raises:
+            ValueError: if chunk_size is less than 1
+
+        Yields:
+            lists of realizations, in `realizations()` order
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        chunk = []
+        for realization in self.realizations():
+            chunk.append(realization)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def realizations_table(self) -> np.ndarray:
+        """
+        Export the realizations of the model as a NumPy structured array.
+
+        There is a row per realization, with the branch index, registry hash digest and `branch_id` of each source
+        and applicable GMCM branch set, and the realization weight (see `nzshm_model.logic_tree.table`).
+
+        Returns:
+            the table, rows in `realizations()` order
+        """
+        gmcm_logic_tree = self.applicable_gmcm_logic_tree()
+        dtype = table.realization_table_dtype(self.source_logic_tree, gmcm_logic_tree)
+        return np.concatenate([np.empty(0, dtype=dtype), *self._realizations_table_chunks(gmcm_logic_tree)])
+
+    def realizations_table_chunks(self, chunk_size: int = 100_000) -> Iterator[np.ndarray]:
+        """
+        Export the realizations of the model as NumPy structured arrays, a chunk of rows at a time.
+
+        Parameters:
+            chunk_size: the number of rows in each chunk
+
+        Returns:
+            the chunks of `realizations_table()`
+        """
+        return self._realizations_table_chunks(self.applicable_gmcm_logic_tree(), chunk_size)
+
+    def _realizations_table_chunks(
+        self, gmcm_logic_tree: GMCMLogicTree, chunk_size: int = 100_000
+    ) -> Iterator[np.ndarray]:
+        self.source_logic_tree._check_weights()
+        gmcm_logic_tree._check_weights()
+        return table.realization_table_chunks(self.source_logic_tree, gmcm_logic_tree, chunk_size)
+
+    def realizations_to_parquet(self, path: str | Path, chunk_size: int = 100_000) -> Path:
+        """
+        Write the `realizations_table()` table to a Parquet file, a chunk of rows at a time.
+
+        Requires the optional `pyarrow` dependency.
+
+        Parameters:
+            path: the file path
+            chunk_size: the number of rows in each chunk (row group)
+
+        Returns:
+            the path of the file written
+        """
+        gmcm_logic_tree = self.applicable_gmcm_logic_tree()
+        dtype = table.realization_table_dtype(self.source_logic_tree, gmcm_logic_tree)
+        return table.write_parquet(self._realizations_table_chunks(gmcm_logic_tree, chunk_size), dtype, path)
+
     def psha_adapter(
         self, provider: type[ModelPshaAdapterInterface], **kwargs: dict | None
     ) -> "ModelPshaAdapterInterface":
@@ -181,3 +655,80 @@ class NshmModel(Generic[HazardConfigType]):
             a PSHA Adapter instance
         """
         return provider(target=self)
+
+
+class ModelManifest(NamedTuple):
+    """
+    Metadata of a model, read without loading its logic trees or hazard config (see `NshmModel.get_model_manifest()`).
+
+    Attributes:
+        version: the model version
+        title: the model title
+        resource_digests: the sha256 digests of the resource files that the model was built from, if known
+        source_branch_counts: the short name and number of branches of each source logic tree branch set
+        gmcm_branch_counts: the short name and number of branches of each GMCM logic tree branch set
+    """
+
+    version: str
+    title: str
+    resource_digests: dict[str, str] | None
+    source_branch_counts: tuple[tuple[str, int], ...]
+    gmcm_branch_counts: tuple[tuple[str, int], ...]
+
+
+class ModelCacheInfo(NamedTuple):
+    """
+    Statistics of the model version cache, see `NshmModel.cache_info()`.
+
+    The cache is shared by `get_model_version()`, `get_model_manifest()` and `all_model_manifests()` (which looks up
+    every version), so all of them count as hits or misses.
+
+    Attributes:
+        hits: the number of lookups that used a cached snapshot
+        misses: the number of lookups that loaded a snapshot or resource files
+        maxsize: the maximum number of cached model versions
+        currsize: the number of cached model versions
+    """
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _cached_version_snapshot(cls: type[NshmModel], version: str, resource_key: str) -> bytes:
+    # the snapshot of a model version, for the digest (key) of its resource files; snapshots are immutable bytes, so
+    # cached snapshots are safely shared
+    model_args = cls._model_version_args(version)
+    resource_digests = _resource_digests(model_args)
+    snapshot_path = SNAPSHOT_PATH / f"{version}{SNAPSHOT_SUFFIX}"
+    if snapshot_path.is_file():
+        data = snapshot_path.read_bytes()
+        try:
+            cls.from_snapshot(data, resource_digests=resource_digests)
+            return data
+        except SnapshotError as error:
+            warnings.warn(f"loading {version} from resource files, not the snapshot: {error}", stacklevel=3)
+    return cls.from_files(**model_args).to_snapshot(resource_digests=resource_digests)
+
+
+def _resource_digests(model_args: dict[str, Any]) -> dict[str, str]:
+    # the sha256 digests of the resource files of a model version
+    return {name: _file_digest(model_args[name]) for name in ('slt_json', 'gmm_json', 'hazard_config_json')}
+
+
+# the modification time and size of each hashed file, and its digest
+_file_digests: dict[Path, tuple[tuple[int, int], str]] = {}
+
+
+def _file_digest(path: Path) -> str:
+    # the sha256 digest of a file, hashed again only when its modification time or size has changed
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_digests.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    _file_digests[path] = (signature, digest)
+    return digest
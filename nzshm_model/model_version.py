@@ -6,7 +6,7 @@ Attributes:
 
 """
 
-from .model import NshmModel
+from .model import ModelManifest, NshmModel
 from .model_versions import versions
 
 CURRENT_VERSION = "NSHM_v1.0.4"
@@ -19,6 +19,13 @@ def all_model_versions() -> list[str]:
     return list(versions.keys())
 
 
+def all_model_manifests() -> list['ModelManifest']:
+    """
+    get the manifests of the available model versions, without loading the models
+    """
+    return [NshmModel.get_model_manifest(version) for version in versions]
+
+
 def get_model_version(version: str = CURRENT_VERSION) -> 'NshmModel':
     """
     A simple wrapper for the underlying NshmModel static method
@@ -27,3 +34,13 @@ def get_model_version(version: str = CURRENT_VERSION) -> 'NshmModel':
         the model instance.
     """
     return NshmModel.get_model_version(version)
+
+
+def get_model_manifest(version: str = CURRENT_VERSION) -> 'ModelManifest':
+    """
+    A simple wrapper for the underlying NshmModel static method
+
+    Returns:
+        the model manifest.
+    """
+    return NshmModel.get_model_manifest(version)
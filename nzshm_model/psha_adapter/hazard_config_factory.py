@@ -1,6 +1,7 @@
-import json
 from pathlib import Path
+from typing import Any
 
+from nzshm_model.logic_tree.loader import load_json
 from nzshm_model.psha_adapter.hazard_config import HazardConfig
 from nzshm_model.psha_adapter.openquake.hazard_config import OpenquakeConfig
 
@@ -14,6 +15,7 @@ class HazardConfigFactory:
         >>> hazard_config = HazardConfigType()
         >>> HazardConfigType = hazard_config_class_factory.get_hazard_config_class_from_file(hazard_config.json)
         >>> hazard_config = HazardConfigType.from_json(hazard_config.json)
+        >>> hazard_config = hazard_config_class_factory.hazard_config_from_file(hazard_config.json)
     """
 
     def __init__(self):
@@ -29,12 +31,15 @@ class HazardConfigFactory:
             raise ValueError(type_name)
         return config_type
 
+    @staticmethod
+    def detect_hazard_config_class(data: dict[str, Any]) -> str:
+        """Get the concrete HazardConfig type from the dict representation of the object."""
+        return data["hazard_type"].casefold()
+
     @staticmethod
     def detect_hazard_config_class_from_file(file_path: str | Path) -> str:
         """Get the concrete HazardConfig type from the json file representation of the object."""
-        with Path(file_path).open() as config_file:
-            data = json.load(config_file)
-            return data["hazard_type"].casefold()
+        return HazardConfigFactory.detect_hazard_config_class(load_json(file_path))
 
     def get_hazard_config_class_from_file(self, file_path: str | Path) -> type[HazardConfig]:
         """Get the concrete HazardConfig object by detecting the type from the json file
@@ -42,6 +47,12 @@ class HazardConfigFactory:
         type_name = self.detect_hazard_config_class_from_file(file_path)
         return self.get_hazard_config_class(type_name)
 
+    def hazard_config_from_file(self, file_path: str | Path) -> HazardConfig:
+        """Create a HazardConfig object of the type detected from its json file representation, reading the file
+        once."""
+        data = load_json(file_path)
+        return self.get_hazard_config_class(self.detect_hazard_config_class(data)).from_dict(data)
+
 
 hazard_config_class_factory = HazardConfigFactory()
 hazard_config_class_factory.register_config_class('openquake', OpenquakeConfig)
@@ -3,6 +3,7 @@
 # noqa
 import logging
 import os
+import pathlib
 
 import click
 
@@ -15,6 +16,7 @@ from nzshm_model.logic_tree.source_logic_tree.version1.slt_config import from_co
 
 # from nzshm_model.source_logic_tree.slt_config import from_config, resolve_toshi_source_ids  # noqa
 from nzshm_model.psha_adapter.openquake import OpenquakeSourcePshaAdapter
+from nzshm_model.snapshot import SNAPSHOT_SUFFIX
 
 log = logging.getLogger()
 logging.basicConfig(level=logging.INFO)
@@ -100,18 +102,8 @@ def config(cache_folder, output_folder, model_id):
     model = nzshm_model.get_model_version(model_id)
     slt = model.source_logic_tree  # always version 2
 
-    ## example filter functions
-    def unscaled_filter(obj):
-        for v in obj.values:
-            if v.name == 's' and v.value == 1.0:  # moment rate scaling
-                return True
-
-    def geodetic_filter(obj):
-        for v in obj.values:
-            if v.long_name == 'deformation model' and v.value == "geodetic":
-                return True
-
-    slt = SourceLogicTree.from_branches(fb for fb in slt if unscaled_filter(fb) and geodetic_filter(fb))
+    # select the geodetic deformation model, unscaled (s=1.0) branches
+    slt = slt.select(dm="geodetic", s=1.0)
 
     adapter = slt.psha_adapter(provider=OpenquakeSourcePshaAdapter)
 
@@ -119,5 +111,17 @@ def config(cache_folder, output_folder, model_id):
     click.echo('DONE')
 
 
+@cli.command()
+@click.option('--output_folder', '-o', default=lambda: str(nzshm_model.model.SNAPSHOT_PATH))
+@click.option('--model_id', '-m', multiple=True, help="model version(s), defaults to all versions")
+def snapshot(output_folder, model_id):
+    """Build the snapshots of model versions, used by get_model_version."""
+    for version in model_id or nzshm_model.all_model_versions():
+        path = pathlib.Path(output_folder) / f"{version}{SNAPSHOT_SUFFIX}"
+        path.write_bytes(nzshm_model.NshmModel.version_snapshot(version))
+        click.echo(f"{version}: {path}")
+    click.echo('DONE')
+
+
 if __name__ == "__main__":
     cli()  # pragma: no cover
@@ -1,13 +1,11 @@
-import dataclasses
 import io
-import json
 import logging
 import sys
 
 import click
 
-import nzshm_model
-from nzshm_model import all_model_versions, branch_registry, get_model_version
+from nzshm_model import all_model_manifests, all_model_versions, branch_registry, get_model_version
+from nzshm_model.logic_tree import json_writer
 
 log = logging.getLogger()
 logging.basicConfig(level=logging.WARN)
@@ -37,21 +35,28 @@ def slt():
 def cli_ls(long):
     """List the available model versions."""
 
-    for version in all_model_versions():
-        if not long:
+    if not long:
+        for version in all_model_versions():
             click.echo(version)
-            continue
-        model = nzshm_model.get_model_version(version)
-        click.echo(f"{model.version} `{model.title}`")
+        return
+    for manifest in all_model_manifests():
+        click.echo(f"{manifest.version} `{manifest.title}`")
 
 
 @slt.command(name='to_json')
 @click.argument('model_id')
-def cli_model_as_json(model_id: str):
+@click.option('-c', '--compact', is_flag=True, help="write compact json, without indentation.")
+@click.option(
+    '-d',
+    '--to-dict',
+    is_flag=True,
+    help="write the to_dict() form, with correlations as branch names, as from_json loads.",
+)
+def cli_model_as_json(model_id: str, compact: bool, to_dict: bool):
     """Get the model in json form."""
     model = get_model_version(model_id)
-    j = json.dumps(dataclasses.asdict(model.source_logic_tree), indent=4)
-    click.echo(j)
+    json_writer.write_json(model.source_logic_tree, sys.stdout, indent=None if compact else 4, asdict=not to_dict)
+    sys.stdout.write('\n')
 
 
 @slt.command(name='hash_sources')
@@ -33,3 +33,11 @@ def test_class_from_file():
     config_filepath = Path(fixtures_dir / 'hazard_config.json')
     config_class = hazard_config_class_factory.get_hazard_config_class_from_file(config_filepath)
     assert config_class == OpenquakeConfig
+
+
+def test_hazard_config_from_file():
+
+    config_filepath = Path(fixtures_dir / 'hazard_config.json')
+    hazard_config = hazard_config_class_factory.hazard_config_from_file(config_filepath)
+    assert isinstance(hazard_config, OpenquakeConfig)
+    assert hazard_config.to_dict() == OpenquakeConfig.from_json(config_filepath).to_dict()
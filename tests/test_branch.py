@@ -0,0 +1,94 @@
+import copy
+import pickle
+from dataclasses import asdict, replace
+
+import pytest
+
+from nzshm_model.logic_tree import CompositeBranch, SourceLogicTree
+from nzshm_model.logic_tree.gmcm_logic_tree import GMCMBranch
+from nzshm_model.logic_tree.source_logic_tree import BranchAttributeValue, SourceBranch
+from nzshm_model.logic_tree.source_logic_tree.logic_tree import DistributedSource, InversionSource
+
+
+def test_source_branch_hash():
+    branch = SourceBranch(branch_id="1", sources=[DistributedSource(nrml_id="ABC")])
+    same = SourceBranch(branch_id="1", sources=[DistributedSource(nrml_id="ABC")])
+    other = SourceBranch(branch_id="1", sources=[DistributedSource(nrml_id="DEF")])
+
+    assert branch == same and hash(branch) == hash(same)
+    assert branch.identity_key != other.identity_key
+    assert {branch, same, other} == {branch, other}
+    assert {branch: 1}[same] == 1
+
+
+def test_gmcm_branch_hash():
+    branch = GMCMBranch(gsim_name="A", gsim_args={'a': 1.0, 'b': 'x'})
+    same = GMCMBranch(gsim_name="A", gsim_args={'b': 'x', 'a': 1})
+    other = GMCMBranch(gsim_name="A", gsim_args={'a': 2.0, 'b': 'x'})
+
+    assert branch == same and hash(branch) == hash(same)
+    assert len({branch, same, other}) == 2
+
+    # unhashable argument values
+    assert hash(GMCMBranch(gsim_name="A", gsim_args={'a': [1, 2]}))
+
+
+def test_identity_key_reset():
+    branch = SourceBranch(branch_id="1", sources=[DistributedSource(nrml_id="ABC")])
+    key = branch.identity_key
+    assert branch.identity_key is key
+
+    # assigning an attribute resets the key
+    branch.branch_id = "2"
+    assert branch.identity_key != key
+    assert branch == replace(branch) and hash(branch) == hash(replace(branch))
+
+    # modifying in place requires an explicit reset
+    key = branch.identity_key
+    branch.sources.append(DistributedSource(nrml_id="DEF"))
+    assert branch.identity_key is key
+    branch.reset_identity_key()
+    assert branch.identity_key != key
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        SourceBranch(branch_id="1", values=[BranchAttributeValue("s", "moment rate scaling", 1.0)]),
+        GMCMBranch(gsim_name="A", gsim_args={'a': 1.0}),
+        BranchAttributeValue("bN", "bN pair", [0.95, 16.5]),
+        InversionSource(nrml_id="ABC"),
+        DistributedSource(nrml_id="ABC"),
+        CompositeBranch(branches=[GMCMBranch(branch_id="1", weight=0.5)]),
+    ],
+)
+def test_slotted(obj):
+    assert not hasattr(obj, '__dict__')
+    assert copy.deepcopy(obj) == obj
+    assert pickle.loads(pickle.dumps(obj)) == obj
+
+
+def test_slotted_branch_hash_after_copy():
+    branch = SourceBranch(branch_id="1", sources=[DistributedSource(nrml_id="ABC")])
+    key = branch.identity_key
+    assert hash(pickle.loads(pickle.dumps(branch))) == hash(branch)
+    assert copy.copy(branch).identity_key == key
+
+    branch.branch_id = "2"
+    assert branch.identity_key != key
+    assert '_identity_key_cache' not in asdict(branch)
+
+
+def test_slotted_logic_tree_round_trip(current_model):
+    slt = current_model.source_logic_tree
+    assert SourceLogicTree.from_dict(slt.to_dict()) == slt
+
+
+def test_filtered_branch_to_branch_copy(current_model):
+    slt = current_model.source_logic_tree
+    filtered_branch = next(iter(slt))
+    filtered_branch._branch = None  # not a view
+    branch = filtered_branch.to_branch()
+    assert type(branch) is SourceBranch
+    assert branch == slt.branch_sets[0].branches[0]
+    assert branch is not slt.branch_sets[0].branches[0]
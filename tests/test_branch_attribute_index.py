@@ -0,0 +1,100 @@
+import pytest
+
+import nzshm_model
+from nzshm_model.logic_tree.source_logic_tree import BranchAttributeIndex, BranchAttributeValue
+
+
+@pytest.fixture(scope='module')
+def full_slt():
+    yield nzshm_model.get_model_version('NSHM_v1.0.4').source_logic_tree
+
+
+def scan_positions(slt, name, value, short_name=None):
+    return [
+        (i_set, i_branch)
+        for i_set, branch_set in enumerate(slt.branch_sets)
+        for i_branch, branch in enumerate(branch_set.branches)
+        if (short_name is None or branch_set.short_name == short_name)
+        and any(v.name == name and v.value == value for v in branch.values)
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, value, short_name",
+    [
+        ("dm", "geodetic", None),
+        ("s", 1.0, None),
+        ("s", 1.0, "CRU"),
+        ("bN", [0.95, 16.5], "HIK"),
+        ("r", "uniform", None),
+    ],
+)
+def test_positions(full_slt, name, value, short_name):
+    index = full_slt.attribute_index
+    expected = scan_positions(full_slt, name, value, short_name)
+    assert expected
+    assert index.positions(name, value, short_name) == expected
+    assert index.weights(name, value, short_name) == [
+        full_slt.branch_sets[i_set].branches[i_branch].weight for i_set, i_branch in expected
+    ]
+
+
+def test_values_and_names(full_slt):
+    index = full_slt.attribute_index
+    assert index.names == ['dm', 'bN', 'C', 's', 'td', 'r', 'd']
+    assert index.long_name('s') == 'moment rate scaling'
+    assert index.values('bN', 'HIK') == [(0.95, 16.5), (1.097, 21.5), (1.241, 27.9)]
+    assert index.values('dm', 'SLAB') == []
+    assert index.positions('dm', 'no such model') == []
+
+
+def test_marginal_weights(full_slt):
+    index = full_slt.attribute_index
+    for branch_set in full_slt.branch_sets:
+        for name in index.names:
+            marginals = index.marginal_weights(name, branch_set.short_name)
+            if marginals:
+                assert sum(marginals.values()) == pytest.approx(1.0)
+    assert index.marginal_weights('dm', 'CRU') == pytest.approx({'geodetic': 0.5, 'geologic': 0.5})
+
+    with pytest.raises(ValueError):
+        index.marginal_weights('dm', 'XYZ')
+
+
+def test_match(full_slt):
+    index = full_slt.attribute_index
+    branch = full_slt.branch_sets[2].branches[3]
+    assert (2, 3) in index.match(branch.values, 'CRU')
+    assert index.match([BranchAttributeValue('dm', 'deformation model', 'geodetic')], 'HIK') == []
+
+
+def test_index_is_cached(full_slt):
+    index = full_slt.attribute_index
+    assert full_slt.attribute_index is index
+    full_slt.reset_attribute_index()
+    assert full_slt.attribute_index is not index
+    assert isinstance(full_slt.attribute_index, BranchAttributeIndex)
+
+
+def test_index_after_in_place_changes():
+    slt = nzshm_model.get_model_version('NSHM_v1.0.4').source_logic_tree
+    index = slt.attribute_index
+
+    # in place changes keep the cached index until it is reset
+    slt.branch_sets.reverse()
+    assert slt.attribute_index is index
+    slt.reset_attribute_index()
+    assert scan_positions(slt, 's', 1.0) == sorted(slt.attribute_index.positions('s', 1.0))
+    cru = slt.select(branch_sets=["CRU"], dm="geodetic", s=1.0)
+    assert [bs.short_name for bs in cru.branch_sets] == ["CRU"]
+
+    crustal = slt.branch_sets[1]
+    del crustal.branches[0]
+    slt.reset_attribute_index()
+    assert scan_positions(slt, 'dm', 'geodetic') == sorted(slt.attribute_index.positions('dm', 'geodetic'))
+
+    # assigning the branch sets resets the index
+    index = slt.attribute_index
+    slt.branch_sets = list(slt.branch_sets)
+    assert slt.attribute_index is not index
+    assert slt.attribute_index is slt.attribute_index
@@ -0,0 +1,332 @@
+import random
+import uuid
+from functools import partial, reduce
+from itertools import product
+from operator import mul
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from nzshm_model.logic_tree.branch import Branch
+from nzshm_model.logic_tree.composite import AliasTable, CompositeSpace, ResolvedCorrelation
+from nzshm_model.logic_tree.correlation import Correlation, LogicTreeCorrelations
+from nzshm_model.logic_tree.logic_tree_base import BranchSet, LogicTree
+
+
+@pytest.fixture(scope='module')
+@patch.multiple(LogicTree, __abstractmethods__=set())
+@patch.multiple(Branch, __abstractmethods__=set())
+def logic_trees():
+    branchA = [Branch(branch_id=f"A{i}", weight=w) for i, w in enumerate([0.2, 0.2, 0.3, 0.3])]
+    branchB = [Branch(branch_id=f"B{i}", weight=w) for i, w in enumerate([0.25, 0.75])]
+    branchC = [Branch(branch_id=f"C{i}", weight=w) for i, w in enumerate([0.1, 0.4, 0.5])]
+    branch_sets = [
+        BranchSet(short_name="A", branches=branchA),
+        BranchSet(short_name="B", branches=branchB),
+        BranchSet(short_name="C", branches=branchC),
+    ]
+
+    # A0, A1 are correlated with B, A2, A3 combine freely with B unless C0 (also correlated with B) is present
+    correlations = LogicTreeCorrelations(
+        [
+            Correlation(primary_branch=branchA[0], associated_branches=[branchB[0]]),
+            Correlation(primary_branch=branchA[1], associated_branches=[branchB[1]]),
+            Correlation(primary_branch=branchC[0], associated_branches=[branchB[1]], weight=0.1),
+        ]
+    )
+    return dict(
+        uncorrelated=LogicTree(branch_sets=branch_sets),
+        correlated=LogicTree(branch_sets=branch_sets, correlations=correlations),
+    )
+
+
+def expected(logic_tree):
+    weights, indices = [], []
+    for composite_branch in logic_tree.composite_branches:
+        weights.append(composite_branch.weight)
+        indices.append(
+            [
+                bs.branches.index(branch)
+                for bs, branch in zip(logic_tree.branch_sets, composite_branch.branches, strict=True)
+            ]
+        )
+    return np.array(weights), np.array(indices)
+
+
+@pytest.mark.parametrize("name", ["uncorrelated", "correlated"])
+def test_composite_weights(logic_trees, name):
+    logic_tree = logic_trees[name]
+    weights, indices = logic_tree.composite_weights()
+    expected_weights, expected_indices = expected(logic_tree)
+
+    assert indices.shape == (len(expected_weights), len(logic_tree.branch_sets))
+    assert (indices == expected_indices).all()
+    assert weights == pytest.approx(expected_weights)
+
+
+def test_composite_weights_model(current_model):
+    for logic_tree in (current_model.source_logic_tree, current_model.gmm_logic_tree):
+        weights, indices = logic_tree.composite_weights()
+        expected_weights, expected_indices = expected(logic_tree)
+
+        assert (indices == expected_indices).all()
+        assert weights == pytest.approx(expected_weights)
+        assert weights.sum() == pytest.approx(1.0)
+
+
+def filtered_product(branch_weights, correlations):
+    """the composite branches that pass the correlations, checking every combination."""
+    for indices in product(*[range(len(weights)) for weights in branch_weights]):
+        governing = [cor for cor in correlations if indices[cor.primary[0]] == cor.primary[1]]
+        if not governing:
+            yield indices, reduce(mul, [branch_weights[i][j] for i, j in enumerate(indices)], 1.0)
+            continue
+        cor = governing[0]
+        if not all(position and indices[position[0]] == position[1] for position in cor.positions):
+            continue
+        correlated_sets = [position[0] for position in cor.positions]
+        weights = [branch_weights[i][j] for i, j in enumerate(indices) if i not in correlated_sets]
+        yield indices, reduce(mul, [cor.weight] + weights, 1.0)
+
+
+def random_space(seed):
+    rnd = random.Random(seed)
+    branch_weights = [[rnd.random() for _ in range(rnd.randint(1, 5))] for _ in range(rnd.randint(1, 5))]
+    positions = [(i, j) for i, weights in enumerate(branch_weights) for j in range(len(weights))]
+    correlations = []
+    primaries = set()
+    for _ in range(rnd.randint(0, 6)):
+        primary, *associated = rnd.sample(positions, min(len(positions), rnd.randint(2, 3)))
+        if primary in primaries:
+            continue
+        primaries.add(primary)
+        correlations.append(ResolvedCorrelation(weight=rnd.random(), primary=primary, associated=tuple(associated)))
+    return branch_weights, correlations
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_composite_space_matches_filtered_product(seed):
+    branch_weights, correlations = random_space(seed)
+    composites = list(CompositeSpace(branch_weights, correlations))
+    expected_composites = list(filtered_product(branch_weights, correlations))
+
+    assert [indices for indices, _ in composites] == [indices for indices, _ in expected_composites]
+    assert [weight for _, weight in composites] == pytest.approx([weight for _, weight in expected_composites])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_composite_space_total_weight(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    assert space.total_weight() == pytest.approx(sum(weight for _, weight in space))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_composite_space_random_access(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    composites = list(space)
+
+    assert len(space) == len(composites)
+    for i, (indices, weight) in enumerate(composites):
+        assert space.indices_at(i) == indices
+        assert space.weight(indices) == weight
+    if composites:
+        assert space.indices_at(-1) == composites[-1][0]
+    with pytest.raises(IndexError):
+        space.indices_at(len(composites))
+
+
+def test_composite_branch_at(current_model):
+    slt = current_model.source_logic_tree
+    composite_branches = list(slt.composite_branches)
+
+    assert slt.num_composite_branches == len(composite_branches) == 36 * 9
+    for i in (0, 1, 100, len(composite_branches) - 1):
+        assert slt.composite_branch_at(i) == composite_branches[i]
+
+
+def test_composite_space_missing_branch():
+    # a correlation with an associated branch outside of the logic tree can never be satisfied
+    correlations = [ResolvedCorrelation(weight=0.5, primary=(0, 0), associated=(None,))]
+    composites = list(CompositeSpace([[0.5, 0.5], [0.5, 0.5]], correlations))
+    assert [indices for indices, _ in composites] == [(1, 0), (1, 1)]
+
+
+def test_composite_space_empty():
+    assert list(CompositeSpace([], [])) == [((), 1.0)]
+    assert list(CompositeSpace([[1.0], []], [])) == []
+
+
+@pytest.mark.parametrize("n_shards", [1, 4, 7])
+def test_iter_composite_shard(current_model, n_shards):
+    slt = current_model.source_logic_tree
+    shards = [list(slt.iter_composite_shard(shard, n_shards)) for shard in range(n_shards)]
+
+    assert [branch for shard in shards for branch in shard] == list(slt.composite_branches)
+    assert max(len(shard) for shard in shards) - min(len(shard) for shard in shards) <= 1
+
+    with pytest.raises(ValueError):
+        next(slt.iter_composite_shard(n_shards, n_shards))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_composite_space_iter_range(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    composites = list(space)
+    for start, stop in [(0, 1), (1, len(composites) - 1), (len(composites) // 2, len(composites) + 5), (3, 2)]:
+        assert list(space.iter_range(start, stop)) == composites[max(start, 0) : stop]
+
+
+def composite_key(composite_branch):
+    return ":".join(branch.branch_id for branch in composite_branch.branches), composite_branch.weight
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_map_composites(current_model, workers):
+    slt = current_model.source_logic_tree
+    expected_keys = [composite_key(composite_branch) for composite_branch in slt.composite_branches]
+    assert list(slt.map_composites(composite_key, workers=workers, chunk_size=50)) == expected_keys
+
+
+def recorded_composite_key(calls_path, composite_branch):
+    # each call leaves a file behind, so calls in the worker processes are counted
+    (calls_path / uuid.uuid4().hex).touch()
+    return composite_key(composite_branch)
+
+
+def test_map_composites_early_close(current_model, tmp_path):
+    slt = current_model.source_logic_tree
+    workers, chunk_size = 2, 10
+    results = slt.map_composites(partial(recorded_composite_key, tmp_path), workers=workers, chunk_size=chunk_size)
+    assert next(results) == composite_key(next(iter(slt.composite_branches)))
+    results.close()
+
+    # at most the first window of two chunks per worker and the chunk submitted after the first result are run
+    calls = len(list(tmp_path.iterdir()))
+    assert chunk_size <= calls <= (2 * workers + 1) * chunk_size < slt.num_composite_branches
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_composite_space_iter_by_weight(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    by_weight = list(space.iter_by_weight())
+    expected_order = sorted(space, key=lambda composite: -composite[1])
+
+    assert sorted(by_weight) == sorted(space)
+    assert [weight for _, weight in by_weight] == [weight for _, weight in expected_order]
+
+
+def test_top_composites(current_model):
+    for logic_tree in (current_model.source_logic_tree, current_model.gmm_logic_tree):
+        expected_branches = sorted(logic_tree.composite_branches, key=lambda composite: -composite.weight)
+        for k in (0, 1, 10, len(expected_branches) + 1):
+            assert logic_tree.top_composites(k) == expected_branches[:k]
+
+
+def test_top_composites_correlated(logic_trees):
+    logic_tree = logic_trees["correlated"]
+    expected_branches = sorted(logic_tree.composite_branches, key=lambda composite: -composite.weight)
+    assert logic_tree.top_composites(5) == expected_branches[:5]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_composite_space_iter_above(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    composites = list(space)
+    for min_weight in (0.0, 0.01, 0.1, 0.5):
+        assert list(space.iter_above(min_weight)) == [
+            (indices, weight) for indices, weight in composites if weight >= min_weight
+        ]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_composite_space_iter_above_composite_weights(seed):
+    # thresholds equal to composite weights must keep those composites, whatever the rounding of the bounds
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    composites = list(space)
+    weights = sorted((weight for _, weight in composites), reverse=True)
+    for k in sorted({1, 2, len(weights) // 3, len(weights) // 2, len(weights)} & set(range(1, len(weights) + 1))):
+        min_weight = weights[k - 1]
+        assert list(space.iter_above(min_weight)) == [
+            (indices, weight) for indices, weight in composites if weight >= min_weight
+        ]
+
+
+def test_composite_branches_above_top_weights(current_model):
+    for logic_tree in (current_model.source_logic_tree, current_model.gmm_logic_tree):
+        composite_branches = list(logic_tree.composite_branches)
+        for k in (1, 5, 20, 100):
+            min_weight = logic_tree.top_composites(k)[-1].weight
+            kept, _ = logic_tree.composite_branches_above(min_weight)
+            assert kept == [composite for composite in composite_branches if composite.weight >= min_weight]
+
+
+@pytest.mark.parametrize("name", ["uncorrelated", "correlated"])
+def test_composite_branches_above(logic_trees, name):
+    logic_tree = logic_trees[name]
+    composite_branches = list(logic_tree.composite_branches)
+
+    kept, retained_weight = logic_tree.composite_branches_above(0.05)
+    assert kept == [composite for composite in composite_branches if composite.weight >= 0.05]
+    assert 0 < len(kept) < len(composite_branches)
+    assert retained_weight == pytest.approx(sum(composite.weight for composite in kept))
+
+    kept, retained_weight = logic_tree.composite_branches_above(0.0)
+    assert kept == composite_branches
+    assert retained_weight == pytest.approx(1.0)
+
+    assert logic_tree.composite_branches_above(1.1) == ([], 0.0)
+
+
+def test_alias_table():
+    weights = np.array([0.1, 0.0, 0.6, 0.3])
+    drawn = AliasTable(weights * 2).sample(np.random.default_rng(1), 100_000)
+    frequencies = np.bincount(drawn, minlength=len(weights)) / len(drawn)
+    assert frequencies == pytest.approx(weights, abs=0.01)
+    assert frequencies[1] == 0.0
+
+    for bad_weights in ([], [0.0, 0.0], [0.5, -0.5, 1.0]):
+        with pytest.raises(ValueError):
+            AliasTable(bad_weights)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_composite_space_sample(seed):
+    branch_weights, correlations = random_space(seed)
+    space = CompositeSpace(branch_weights, correlations)
+    composites = dict(space)
+    if not composites:
+        with pytest.raises(ValueError):
+            space.sample(1, np.random.default_rng(seed))
+        return
+    n = 20_000
+    weights, indices = space.sample(n, np.random.default_rng(seed))
+
+    assert indices.shape == (n, len(branch_weights))
+    rows = [tuple(row) for row in indices.tolist()]
+    assert all(row in composites for row in rows)
+    assert weights.tolist() == [composites[row] for row in rows]
+
+    drawn, counts = np.unique(indices, axis=0, return_counts=True)
+    expected = np.array([composites[tuple(row)] for row in drawn.tolist()]) / space.total_weight()
+    assert counts / n == pytest.approx(expected, abs=0.02)
+
+
+def test_sample(logic_trees):
+    logic_tree = logic_trees["correlated"]
+    composite_branches = list(logic_tree.composite_branches)
+
+    samples = logic_tree.sample(1000, seed=42)
+    assert len(samples) == 1000
+    assert all(sample in composite_branches for sample in samples)
+    assert samples == logic_tree.sample(1000, seed=42)
+
+    weights, indices = logic_tree.sample_composite_weights(1000, seed=42)
+    assert samples[0].weight == weights[0]
+    assert indices.shape == (1000, 3)
@@ -0,0 +1,91 @@
+import sys
+
+import numpy as np
+import pytest
+
+import nzshm_model as nm
+from nzshm_model.branch_registry import identity_digest
+from nzshm_model.logic_tree import GMCMBranch, GMCMBranchSet, GMCMLogicTree
+
+
+def check_row(row, branch_sets, composite_branch, prefix=''):
+    for branch_set, branch in zip(branch_sets, composite_branch.branches, strict=True):
+        name = f"{prefix}{branch_set.short_name}"
+        assert row[f"{name}_index"] == branch_set.branches.index(branch)
+        assert row[f"{name}_digest"] == identity_digest(branch.registry_identity).encode()
+        assert row[f"{name}_branch_id"] == branch.branch_id
+
+
+def test_to_table(current_model):
+    for logic_tree in (current_model.source_logic_tree, current_model.gmm_logic_tree):
+        table = logic_tree.to_table()
+        composite_branches = list(logic_tree.composite_branches)
+
+        assert len(table) == len(composite_branches)
+        assert (table['composite_index'] == np.arange(len(table))).all()
+        assert table['weight'] == pytest.approx([composite.weight for composite in composite_branches])
+        for row, composite_branch in zip(table, composite_branches, strict=True):
+            check_row(row, logic_tree.branch_sets, composite_branch)
+
+
+def test_table_chunks(current_model):
+    logic_tree = current_model.source_logic_tree
+    chunks = list(logic_tree.table_chunks(chunk_size=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100, 24]
+    assert (np.concatenate(chunks) == logic_tree.to_table()).all()
+
+    with pytest.raises(ValueError):
+        next(logic_tree.table_chunks(chunk_size=0))
+
+
+def test_table_unique_short_names():
+    branch_sets = [
+        GMCMBranchSet(short_name="A", branches=[GMCMBranch(branch_id="1", weight=1.0)]),
+        GMCMBranchSet(short_name="A", branches=[GMCMBranch(branch_id="2", weight=1.0)]),
+    ]
+    with pytest.raises(ValueError):
+        GMCMLogicTree(branch_sets=branch_sets).to_table()
+
+
+def test_realizations_table(current_version):
+    model = nm.get_model_version(current_version)
+    model.source_logic_tree = model.source_logic_tree.select(branch_sets=["CRU"])
+    gmcm_logic_tree = model.applicable_gmcm_logic_tree()
+    table = model.realizations_table()
+    realizations = list(model.realizations())
+
+    assert len(table) == len(realizations) == 36 * 21
+    assert table['weight'] == pytest.approx([realization.weight for realization in realizations])
+    for row, realization in zip(table, realizations, strict=True):
+        assert (row['source_composite_index'], row['gmcm_composite_index']) == realization.indices
+        check_row(row, model.source_logic_tree.branch_sets, realization.source_branch, prefix='source_')
+        check_row(row, gmcm_logic_tree.branch_sets, realization.gmcm_branch, prefix='gmcm_')
+
+    chunks = list(model.realizations_table_chunks(chunk_size=500))
+    assert [len(chunk) for chunk in chunks] == [500, 256]
+    assert (np.concatenate(chunks) == table).all()
+
+
+def test_realizations_table_chunk(current_model):
+    chunk = next(current_model.realizations_table_chunks(chunk_size=5000))
+    realizations = list(current_model.realizations(0, 5000))
+    assert (chunk['realization_index'] == np.arange(5000)).all()
+    assert chunk['weight'] == pytest.approx([realization.weight for realization in realizations])
+
+
+def test_to_parquet(current_model, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    logic_tree = current_model.source_logic_tree
+    path = logic_tree.to_parquet(tmp_path / "slt.parquet", chunk_size=100)
+
+    parquet_table = pq.read_table(path)
+    table = logic_tree.to_table()
+    assert parquet_table.num_rows == len(table)
+    assert parquet_table.column('CRU_digest').to_pylist() == [digest.decode() for digest in table['CRU_digest']]
+    assert parquet_table.column('weight').to_pylist() == table['weight'].tolist()
+
+
+def test_to_parquet_requires_pyarrow(current_model, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ModuleNotFoundError, match="pyarrow"):
+        current_model.source_logic_tree.to_parquet(tmp_path / "slt.parquet")
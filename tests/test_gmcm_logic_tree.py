@@ -4,6 +4,7 @@ import pytest
 
 from nzshm_model import get_model_version
 from nzshm_model.logic_tree import GMCMLogicTree
+from nzshm_model.logic_tree.gmcm_logic_tree.logic_tree import GMCMBranch, GMCMBranchSet
 from nzshm_model.psha_adapter.openquake import NrmlDocument
 from nzshm_model.psha_adapter.openquake.simple_nrml import OpenquakeGMCMPshaAdapter
 
@@ -52,3 +53,19 @@ def test_float_args(gmcm_logic_tree):
             for value in branch.gsim_args.values():
                 if is_number(str(value)):
                     assert isinstance(value, float)
+
+
+def test_validation_unchanged():
+    # GMCM trees are checked on creation, as they were before the validation policy was added
+    assert GMCMLogicTree.from_dict(gmcm_logic_tree_fromjson.to_dict()) == gmcm_logic_tree_fromjson
+
+    branches = [
+        GMCMBranch(
+            branch_id=name, weight=0.3, gsim_name=name, gsim_args={}, tectonic_region_type='Active Shallow Crust'
+        )
+        for name in ('A', 'B')
+    ]
+    branch_sets = [GMCMBranchSet(short_name='ASC', long_name='active shallow crust', branches=branches)]
+    with pytest.raises(ValueError, match="do not sum to 1.0"):
+        GMCMLogicTree(branch_sets=branch_sets)
+    assert GMCMLogicTree(branch_sets=branch_sets, validate='off').branch_sets == branch_sets
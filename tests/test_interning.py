@@ -0,0 +1,127 @@
+"""
+test interning of branch attribute values and sources
+"""
+
+import copy
+import dataclasses
+import importlib.resources as resources
+import json
+import pickle
+
+import pytest
+
+from nzshm_model.logic_tree.source_logic_tree import (
+    BranchAttributeValue,
+    SourceBranch,
+    SourceLogicTree,
+    SourceLogicTreeV1,
+)
+from nzshm_model.logic_tree.source_logic_tree.interning import InternPool
+from nzshm_model.logic_tree.source_logic_tree.logic_tree import DistributedSource, InversionSource
+
+
+def records(slt):
+    for branch in slt:
+        yield from branch.values
+        yield from branch.sources
+
+
+def assert_interned(slt):
+    by_key = {}
+    for record in records(slt):
+        key = (type(record), repr(record.__getstate__()))
+        assert by_key.setdefault(key, record) is record
+
+
+def test_intern_pool():
+    pool = InternPool()
+    value = pool.intern(BranchAttributeValue('s', 'moment rate scaling', 1.0))
+    assert pool.intern(BranchAttributeValue('s', 'moment rate scaling', 1.0)) is value
+    assert pool.intern(BranchAttributeValue('s', 'moment rate scaling', 1)) is not value
+    assert pool.intern(BranchAttributeValue('s', 'other', 1.0)) is not value
+
+    bN = pool.intern(BranchAttributeValue('bN', 'b value and N', [0.823, 2.7]))
+    assert pool.intern(BranchAttributeValue('bN', 'b value and N', [0.823, 2.7])) is bN
+
+    source = pool.intern(DistributedSource(nrml_id='ABC'))
+    assert pool.intern(DistributedSource(nrml_id='ABC')) is source
+    assert pool.intern(InversionSource(nrml_id='ABC')) is not source
+    assert len(pool) == 6
+
+    mapping = pool.intern(BranchAttributeValue('m', 'mapping', {'a': 1}))
+    assert pool.intern(BranchAttributeValue('m', 'mapping', {'a': 1})) is mapping
+    assert pool.intern(BranchAttributeValue('m', 'mapping', {'a': 1.0})) is not mapping
+
+    unhashable = BranchAttributeValue('x', 'unhashable', {1, 2})  # type: ignore[arg-type]
+    assert pool.intern(unhashable) is unhashable
+    assert pool.intern(BranchAttributeValue('x', 'unhashable', {1, 2})) is not unhashable  # type: ignore[arg-type]
+
+
+def test_intern_pool_copy_new():
+    pool = InternPool()
+    value = BranchAttributeValue('bN', 'b value and N', [0.823, 2.7])
+    interned = pool.intern(value, copy_new=True)
+    assert interned == value
+    assert interned.value is not value.value
+    assert pool.intern(value, copy_new=True) is interned
+
+
+def test_sources_immutable():
+    source = InversionSource(nrml_id='ABC', inversion_id='DEF')
+    with pytest.raises(AttributeError):
+        source.nrml_id = 'XYZ'  # type: ignore[misc]
+    assert copy.deepcopy(source) == source
+    assert pickle.loads(pickle.dumps(source)) == source
+
+
+def test_replace_shared_source():
+    # a source shared by branches is changed for one of them by replacing it
+    pool = InternPool()
+    branch, other = (
+        SourceBranch(branch_id=branch_id, sources=[pool.intern(DistributedSource(nrml_id='ABC'))])
+        for branch_id in ('1', '2')
+    )
+    source = branch.sources[0]
+    assert other.sources[0] is source
+
+    branch.sources[0] = dataclasses.replace(source, nrml_id='XYZ')
+    assert branch.sources[0].nrml_id == 'XYZ'
+    assert other.sources[0] is source and source.nrml_id == 'ABC'
+
+
+def test_from_json_interned(current_model):
+    slt = current_model.source_logic_tree
+    assert_interned(slt)
+    s_values = [value for value in records(slt) if getattr(value, 'name', None) == 's' and value.value == 1.0]
+    assert len(s_values) > 1
+    assert all(value is s_values[0] for value in s_values)
+
+
+def test_from_dict_unchanged(current_model):
+    slt = current_model.source_logic_tree
+    reloaded = SourceLogicTree.from_dict(json.loads(json.dumps(slt.to_dict())))
+    assert reloaded == slt
+    assert reloaded.to_dict() == slt.to_dict()
+
+
+def test_migration_interned():
+    data_filepath = resources.files('nzshm_model.resources') / 'SRM_JSON' / 'nshm_v1.0.4.json'
+    with data_filepath.open() as datafile:
+        slt_v1 = SourceLogicTreeV1.from_dict(json.load(datafile))
+    slt = SourceLogicTree.from_source_logic_tree(slt_v1)
+    assert_interned(slt)
+
+    # mutable values are not shared with the v1 tree
+    v1_lists = {id(value.value) for fslt in slt_v1.fault_system_lts for b in fslt.branches for value in b.values}
+    lists = [value.value for branch in slt for value in branch.values if isinstance(value.value, list)]
+    assert lists
+    assert not any(id(value) in v1_lists for value in lists)
+
+
+def test_intern_records_shares_pool(current_model):
+    slt = current_model.source_logic_tree
+    other = copy.deepcopy(slt)
+    pool = slt.intern_records()
+    other.intern_records(pool)
+    for record, other_record in zip(records(slt), records(other), strict=True):
+        assert record is other_record
@@ -0,0 +1,70 @@
+"""
+test the streaming logic tree json writer against json.dumps of LogicTree.to_dict()
+"""
+
+import dataclasses
+import importlib.resources as resources
+import io
+import json
+
+import pytest
+
+from nzshm_model.logic_tree import GMCMLogicTree, SourceLogicTree
+from nzshm_model.logic_tree.json_writer import iter_json, write_json
+
+
+@pytest.fixture(
+    params=[
+        (SourceLogicTree, 'SRM_JSON/nshm_v1.0.4_v2.json'),
+        (GMCMLogicTree, 'GMM_JSON/gmcm_nshm_v1.0.4.json'),
+    ]
+)
+def logic_tree(request):
+    logic_tree_class, resource = request.param
+    return logic_tree_class.from_json(resources.files('nzshm_model.resources') / resource)
+
+
+@pytest.mark.parametrize("indent", [2, 4, 0])
+def test_same_as_json_dumps(logic_tree, indent):
+    assert ''.join(iter_json(logic_tree, indent)) == json.dumps(logic_tree.to_dict(), indent=indent)
+
+
+def test_compact(logic_tree):
+    text = ''.join(iter_json(logic_tree, indent=None))
+    assert text == json.dumps(logic_tree.to_dict(), separators=(',', ':'))
+    assert '\n' not in text
+
+
+def test_correlations():
+    logic_tree = SourceLogicTree.from_json(resources.files('nzshm_model.resources') / 'SRM_JSON/nshm_v1.0.4_v2.json')
+    assert logic_tree.correlations
+    data = json.loads(''.join(iter_json(logic_tree)))
+    assert data['correlations'] == logic_tree.to_dict()['correlations']
+
+
+def test_no_correlations():
+    logic_tree = SourceLogicTree(title='empty', version='1')
+    text = ''.join(iter_json(logic_tree))
+    assert text == json.dumps(logic_tree.to_dict(), indent=2)
+    assert 'correlations' not in json.loads(text)
+
+
+def test_write_json(logic_tree):
+    file = io.StringIO()
+    write_json(logic_tree, file, indent=None)
+    assert type(logic_tree).from_dict(json.loads(file.getvalue())) == logic_tree
+
+
+def test_to_json_round_trip(logic_tree, tmp_path):
+    json_path = tmp_path / 'logic_tree.json'
+    logic_tree.to_json(json_path, indent=None)
+    assert type(logic_tree).from_json(json_path) == logic_tree
+    logic_tree.to_json(json_path)
+    assert json_path.read_text() == json.dumps(logic_tree.to_dict(), indent=2)
+
+
+@pytest.mark.parametrize("indent", [4, None])
+def test_asdict(logic_tree, indent):
+    text = ''.join(iter_json(logic_tree, indent, asdict=True))
+    separators = (',', ':') if indent is None else None
+    assert text == json.dumps(dataclasses.asdict(logic_tree), indent=indent, separators=separators)
@@ -0,0 +1,108 @@
+"""
+test the compiled logic tree loaders against dacite
+"""
+
+import importlib.resources as resources
+import json
+
+import dacite
+import pytest
+
+import nzshm_model.logic_tree.loader as loader
+from nzshm_model.logic_tree import GMCMLogicTree, SourceLogicTree
+from nzshm_model.logic_tree.gmcm_logic_tree.logic_tree import GMCMBranch
+from nzshm_model.logic_tree.source_logic_tree.logic_tree import DistributedSource, InversionSource, SourceBranch
+
+DACITE_CONFIG = dacite.Config(strict=True, cast=[tuple])
+
+
+@pytest.mark.parametrize(
+    "logic_tree_class, resource",
+    [
+        (SourceLogicTree, 'SRM_JSON/nshm_v1.0.0_v2.json'),
+        (SourceLogicTree, 'SRM_JSON/nshm_v1.0.4_v2.json'),
+        (GMCMLogicTree, 'GMM_JSON/gmcm_nshm_v1.0.0.json'),
+        (GMCMLogicTree, 'GMM_JSON/gmcm_nshm_v1.0.4.json'),
+    ],
+)
+def test_same_as_dacite(logic_tree_class, resource):
+    data = json.loads((resources.files('nzshm_model.resources') / resource).read_text())
+    data.pop('correlations', None)
+    expected = dacite.from_dict(data_class=logic_tree_class, data=data, config=DACITE_CONFIG)
+    logic_tree = loader.from_dict(logic_tree_class, data)
+
+    assert logic_tree == expected
+    assert repr(logic_tree) == repr(expected)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        dict(branch_id='a', weight=1),
+        dict(branch_id='a', weight=True),
+        dict(branch_id='a', tectonic_region_types=['Active Shallow Crust']),
+        dict(branch_id='a', tectonic_region_types=('Active Shallow Crust',)),
+        dict(sources=[dict(nrml_id='x', type='inversion')]),
+        dict(sources=[dict(nrml_id='x', inversion_id=None), dict(nrml_id='y', type='distributed')]),
+        dict(values=[dict(name='bN', long_name='bN pair', value=[0.902, 4.6])]),
+    ],
+)
+def test_source_branch_same_as_dacite(data):
+    expected = dacite.from_dict(data_class=SourceBranch, data=data, config=DACITE_CONFIG)
+    branch = loader.from_dict(SourceBranch, data)
+    assert repr(branch) == repr(expected)
+    assert [type(source) for source in branch.sources] == [type(source) for source in expected.sources]
+
+
+@pytest.mark.parametrize(
+    "data_class, data, error",
+    [
+        (SourceBranch, dict(branch_id='a', unknown=1), dacite.UnexpectedDataError),
+        (SourceBranch, dict(branch_id=1), dacite.WrongTypeError),
+        (SourceBranch, dict(branch_id='a', tectonic_region_types=['x', 1]), dacite.WrongTypeError),
+        (SourceBranch, dict(rupture_rate_scaling=None), dacite.WrongTypeError),
+        (SourceBranch, dict(values=[dict(name='s', value=1.0)]), dacite.MissingValueError),
+        (SourceBranch, dict(sources=[dict(nrml_id='x', other=1)]), dacite.UnionMatchError),
+        (DistributedSource, dict(), dacite.MissingValueError),
+        (SourceLogicTree, dict(validate='never'), dacite.WrongTypeError),
+        (GMCMBranch, dict(gsim_args={1: 'x'}), dacite.WrongTypeError),
+    ],
+)
+def test_errors_same_as_dacite(data_class, data, error):
+    with pytest.raises(error):
+        dacite.from_dict(data_class=data_class, data=data, config=DACITE_CONFIG)
+    with pytest.raises(error):
+        loader.from_dict(data_class, data)
+
+
+def test_errors_dacite_accepts():
+    # dacite turns strings into a tuple of characters of a generator repr, and fails on data that is not a dict
+    with pytest.raises(dacite.WrongTypeError):
+        loader.from_dict(SourceBranch, dict(branch_id='a', tectonic_region_types='Active Shallow Crust'))
+    with pytest.raises(dacite.WrongTypeError):
+        loader.from_dict(InversionSource, [])
+
+
+def test_error_path():
+    data = dict(branch_sets=[dict(short_name='A', branches=[dict(branch_id='a', weight='heavy')])])
+    with pytest.raises(dacite.WrongTypeError, match='branch_sets.branches.weight'):
+        loader.from_dict(SourceLogicTree, data)
+
+
+def test_dict_values_copied():
+    gsim_args = {'sigma_mu_epsilon': '0.0'}
+    branch = loader.from_dict(GMCMBranch, dict(gsim_name='Atkinson2022SInter', gsim_args=gsim_args))
+    assert branch.gsim_args == gsim_args
+    assert branch.gsim_args is not gsim_args
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_load_json(monkeypatch, tmp_path, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(loader, 'orjson', None)
+    data = dict(title='title', values=[1, 1.5, None, 'text', [0.902, 4.6]])
+    json_path = tmp_path / 'data.json'
+    json_path.write_text(json.dumps(data))
+    assert loader.load_json(json_path) == data
@@ -1,4 +1,5 @@
 from collections import namedtuple
+from dataclasses import replace
 from unittest.mock import patch  # TODO: use pytest to patch?
 
 import pytest
@@ -85,6 +86,18 @@ def test_check_correlations_validation(fixtures: Fixtures):
         LogicTreeCorrelations(correlation_groups=[fixtures.correlation1, correlation2x])
 
 
+@patch.multiple(Branch, __abstractmethods__=set())
+def test_correlations_primary_index(fixtures: Fixtures):
+    correlations = fixtures.logic_tree.correlations
+    assert correlations.primary_index(fixtures.branchA1) == 0
+    assert correlations.primary_index(fixtures.branchA2) == 1
+    assert correlations.primary_index(fixtures.branchB1) is None
+
+    # lookup is by equality, not identity
+    assert correlations.primary_index(replace(fixtures.branchA2)) == 1
+    assert correlations.primary_index(replace(fixtures.branchA2, weight=0.3)) is None
+
+
 def test__composite_branches(fixtures: Fixtures):
 
     assert len(list(fixtures.logic_tree_nocor.composite_branches)) == 4 * 2 * 2
@@ -124,3 +137,35 @@ def test_logic_tree_validation_of_corr(fixtures: Fixtures):
     correlations = LogicTreeCorrelations(correlation_groups=[correlation1, correlation2])
     with pytest.raises(ValueError):
         fixtures.logic_tree.correlations = correlations
+
+
+@patch.multiple(LogicTree, __abstractmethods__=set())
+def test_logic_tree_validation_policy(fixtures: Fixtures):
+    # correlations with incorrect weights
+    correlation1 = Correlation(primary_branch=fixtures.branchA1, associated_branches=[fixtures.branchB1], weight=1.0)
+    correlations = LogicTreeCorrelations(correlation_groups=[correlation1])
+    branch_sets = [fixtures.branchsetA, fixtures.branchsetB]
+
+    with pytest.raises(ValueError):
+        LogicTree(branch_sets=branch_sets, correlations=correlations)  # type: ignore[abstract]
+
+    # lazy validation is deferred until composite branches are used
+    logic_tree: LogicTree = LogicTree(branch_sets=branch_sets, correlations=correlations, validate='lazy')  # type: ignore[abstract]
+    with pytest.raises(ValueError):
+        list(logic_tree.composite_branches)
+    with pytest.raises(ValueError):
+        logic_tree.composite_weights()
+
+    # and happens again after correlations are replaced
+    logic_tree = LogicTree(branch_sets=branch_sets, validate='lazy')  # type: ignore[abstract]
+    assert len(list(logic_tree.composite_branches)) == 8
+    logic_tree.correlations = correlations
+    with pytest.raises(ValueError):
+        list(logic_tree.composite_branches)
+
+    logic_tree = LogicTree(branch_sets=branch_sets, correlations=correlations, validate='off')  # type: ignore[abstract]
+    logic_tree.correlations = correlations
+    assert len(list(logic_tree.composite_branches)) == 7
+
+    with pytest.raises(ValueError):
+        LogicTree(branch_sets=branch_sets, validate='sometimes')  # type: ignore[abstract, arg-type]
@@ -1,4 +1,11 @@
+import asyncio
 import configparser
+import copy
+import hashlib
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pytest
 
@@ -66,6 +73,139 @@ class TestGetNewModel:
         assert model2.title != new_model_title
 
 
+class TestFromFiles:
+    @pytest.fixture
+    def model_args(self, current_version):
+        return nm.NshmModel._model_version_args(current_version)
+
+    def test_from_files_executor(self, model_args):
+        model = nm.NshmModel.from_files(**model_args)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            concurrent_model = nm.NshmModel.from_files(**model_args, executor=executor)
+        assert concurrent_model.source_logic_tree == model.source_logic_tree
+        assert concurrent_model.gmm_logic_tree == model.gmm_logic_tree
+        assert concurrent_model.hazard_config.to_dict() == model.hazard_config.to_dict()
+
+    def test_from_files_async(self, model_args):
+        model = asyncio.run(nm.NshmModel.from_files_async(**model_args))
+        assert model.title == model_args['title']
+        assert model.source_logic_tree == nm.NshmModel.from_files(**model_args).source_logic_tree
+
+    def test_from_files_v1_source_logic_tree(self, model_args):
+        model_args['slt_json'] = nm.model.SLT_SOURCE_PATH / "nshm_v1.0.4.json"
+        model = nm.NshmModel.from_files(**model_args)
+        assert [bs.short_name for bs in model.source_logic_tree.branch_sets] == ['PUY', 'HIK', 'CRU', 'SLAB']
+
+    def test_from_files_lazy(self, model_args, monkeypatch):
+        model = nm.NshmModel.from_files(**model_args, lazy=True)
+        monkeypatch.setattr(nm.NshmModel, '_source_logic_tree_from_json', None)
+        assert model.hazard_config.to_dict() == nm.get_model_version(model.version).hazard_config.to_dict()
+        assert model._loaders.keys() == {'source_logic_tree', 'gmm_logic_tree'}
+
+
+class TestManifest:
+    def test_get_model_manifest(self, current_version):
+        manifest = nm.get_model_manifest(current_version)
+        model = nm.get_model_version(current_version)
+        assert manifest == model.manifest(manifest.resource_digests)
+        assert manifest.title == "NSHM version 1.0.4, corrected fault geometry"
+        assert manifest.source_branch_counts == (('PUY', 3), ('HIK', 9), ('CRU', 36), ('SLAB', 1))
+        assert manifest.resource_digests == nm.model._resource_digests(
+            nm.NshmModel._model_version_args(current_version)
+        )
+
+    def test_manifest_does_not_load_model(self, current_version, monkeypatch):
+        nm.all_model_manifests()  # the snapshots are cached
+        monkeypatch.setattr(nm.NshmModel, '_deferred', None)
+        manifests = nm.all_model_manifests()
+        assert [manifest.version for manifest in manifests] == nm.all_model_versions()
+
+    def test_unknown_version(self):
+        with pytest.raises(ValueError, match="not a valid model version"):
+            nm.get_model_manifest("NSHM_v0.0.0")
+
+
+class TestLazyComponents:
+    def test_threads_load_once(self, current_version):
+        model = nm.get_model_version(current_version)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            trees = list(executor.map(lambda _: model.source_logic_tree, range(32)))
+        assert all(tree is trees[0] for tree in trees)
+        assert 'source_logic_tree' not in model._loaders
+
+    def test_copies_have_own_loaders(self, current_version):
+        model = nm.get_model_version(current_version)
+        model_copy = copy.copy(model)
+        assert model_copy.source_logic_tree is not None
+        assert model.source_logic_tree == model_copy.source_logic_tree
+        assert model.source_logic_tree is not model_copy.source_logic_tree
+        assert 'gmm_logic_tree' in model._loaders
+
+    def test_deepcopy_and_pickle(self, current_version):
+        model = nm.get_model_version(current_version)
+        assert model.hazard_config.hazard_type == "openquake"  # created before copying
+        for other in (copy.deepcopy(model), pickle.loads(pickle.dumps(model))):
+            assert other.hazard_config is not model.hazard_config
+            assert other.gmm_logic_tree == model.gmm_logic_tree
+            assert other.source_logic_tree == model.source_logic_tree
+
+
+class TestModelCache:
+    def test_cache_hits(self, current_version):
+        nm.NshmModel.clear_cache()
+        assert nm.NshmModel.cache_info() == (0, 0, nm.model.MODEL_CACHE_SIZE, 0)
+        nm.get_model_version(current_version)
+        nm.get_model_version(current_version)
+        info = nm.NshmModel.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    def test_changes_are_not_shared(self, current_version):
+        model1 = nm.get_model_version(current_version)
+        model1.hazard_config.set_sites(["WLG"], vs30=[400])
+        model1.source_logic_tree.branch_sets.pop()
+        model1.gmm_logic_tree.branch_sets[0].branches[0].weight = 0.0
+
+        model2 = nm.get_model_version(current_version)
+        assert model2.hazard_config.locations is None
+        assert len(model2.source_logic_tree.branch_sets) == len(model1.source_logic_tree.branch_sets) + 1
+        assert model2.gmm_logic_tree.branch_sets[0].branches[0].weight > 0.0
+
+    def test_cache_hit_does_not_hash_files(self, current_version, monkeypatch):
+        nm.get_model_version(current_version)
+
+        def read_bytes(path):
+            raise AssertionError(f"{path} read")
+
+        monkeypatch.setattr(Path, 'read_bytes', read_bytes)
+        assert nm.get_model_version(current_version).version == current_version
+
+    def test_manifests_use_the_cache(self, current_version):
+        nm.NshmModel.clear_cache()
+        nm.get_model_manifest(current_version)
+        nm.get_model_version(current_version)
+        info = nm.NshmModel.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+
+    def test_file_digest(self, tmp_path):
+        path = tmp_path / 'resource.json'
+        path.write_text('{"a": 1}')
+        digest = nm.model._file_digest(path)
+        assert digest == hashlib.sha256(b'{"a": 1}').hexdigest()
+
+        path.write_text('{"a": 2}')  # the same size
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert nm.model._file_digest(path) == hashlib.sha256(b'{"a": 2}').hexdigest()
+
+    def test_cache_keyed_by_resource_files(self, current_version, monkeypatch):
+        nm.NshmModel.clear_cache()
+        nm.get_model_version(current_version)
+        monkeypatch.setattr(nm.model, '_resource_digests', lambda model_args: {'slt_json': 'changed'})
+        with pytest.warns(UserWarning, match="not the snapshot"):
+            nm.get_model_version(current_version)
+        assert nm.NshmModel.cache_info().misses == 2
+
+
 # class TestGetSourceBranches:
 #     def test_get_first_crustal_branch(self, model_104):
 #         cru_branches = next(model_104.get_source_branch_sets('CRU')).branches
@@ -74,3 +214,50 @@ class TestGetNewModel:
 #     def test_invalid_branch_set(self, model_104):
 #         with pytest.raises(StopIteration):
 #             next(model_104.get_source_branches(['XXX']))
+
+
+class TestRealizations:
+    @pytest.fixture
+    def crustal_model(self, current_version):
+        model = nm.get_model_version(current_version)
+        model.source_logic_tree = model.source_logic_tree.select(branch_sets=["CRU"])
+        return model
+
+    def test_num_realizations(self, current_model):
+        assert current_model.num_realizations == 36 * 9 * 21 * 12 * 12
+
+    def test_realizations_range(self, current_model):
+        source_branches = list(current_model.source_logic_tree.iter_composite_range(0, 2))
+        gmcm_branches = list(current_model.gmm_logic_tree.composite_branches)
+        expected = [
+            nm.model.Realization(source_branch, gmcm_branch, source_branch.weight * gmcm_branch.weight, (i, j))
+            for i, source_branch in enumerate(source_branches)
+            for j, gmcm_branch in enumerate(gmcm_branches)
+        ]
+        assert list(current_model.realizations(0, len(expected))) == expected
+        assert list(current_model.realizations(1000, 4000)) == expected[1000:4000]
+        assert list(current_model.realizations(10, 5)) == []
+
+        last = list(current_model.realizations(current_model.num_realizations - 1))
+        assert len(last) == 1
+        assert last[0].indices == (36 * 9 - 1, len(gmcm_branches) - 1)
+
+    def test_gmcm_branch_sets_follow_source_trts(self, current_model, crustal_model):
+        assert current_model.applicable_gmcm_logic_tree() is current_model.gmm_logic_tree
+
+        gmcm_logic_tree = crustal_model.applicable_gmcm_logic_tree()
+        assert [branch_set.short_name for branch_set in gmcm_logic_tree.branch_sets] == ["CRU"]
+        assert crustal_model.num_realizations == 36 * 21
+
+        realizations = list(crustal_model.realizations())
+        assert len(realizations) == 36 * 21
+        assert all(len(realization.gmcm_branch.branches) == 1 for realization in realizations)
+        assert sum(realization.weight for realization in realizations) == pytest.approx(1.0)
+
+    def test_realization_chunks(self, crustal_model):
+        chunks = list(crustal_model.realization_chunks(100))
+        assert [len(chunk) for chunk in chunks] == [100] * 7 + [56]
+        assert [realization for chunk in chunks for realization in chunk] == list(crustal_model.realizations())
+
+        with pytest.raises(ValueError):
+            next(crustal_model.realization_chunks(0))
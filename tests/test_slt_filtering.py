@@ -71,3 +71,79 @@ def test_build_slt_from_filtered_slt(full_slt):
     assert (
         type(slt.branch_sets[0].branches[0]) is SourceBranch
     )  # isinstance() not used to avoid true for inherited classes
+
+
+def test_build_slt_from_filtered_slt_keeps_correlations(full_slt):
+    subduction = SourceLogicTree.from_branches(fb for fb in full_slt if fb.branch_set.short_name in ("PUY", "HIK"))
+    assert [bs.short_name for bs in subduction.branch_sets] == ["PUY", "HIK"]
+    assert len(subduction.correlations) == len(full_slt.correlations) == 9
+    assert subduction.num_composite_branches == 9
+    assert sum(composite.weight for composite in subduction.composite_branches) == pytest.approx(1.0)
+
+    # correlations are dropped when any of their branches are filtered out
+    hik = SourceLogicTree.from_branches(fb for fb in full_slt if fb.branch_set.short_name == "HIK")
+    assert len(hik.correlations) == 0
+
+    unscaled = SourceLogicTree.from_branches(
+        fb for fb in full_slt if fb.branch_set.short_name in ("PUY", "HIK") and unscaled_filter(fb)
+    )
+    kept = {branch for bs in unscaled.branch_sets for branch in bs.branches}
+    assert 0 < len(unscaled.correlations) < 9
+    for correlation in unscaled.correlations:
+        assert all(branch in kept for branch in correlation.all_branches)
+
+    with pytest.raises(ValueError):
+        SourceLogicTree.from_branches((fb for fb in full_slt if unscaled_filter(fb)), validate='eager')
+
+
+def test_filtered_branches_are_views(full_slt):
+    for filt_branch in full_slt:
+        assert filt_branch.logic_tree is full_slt
+        assert filt_branch.branch_set in full_slt.branch_sets
+        assert any(filt_branch.to_branch() is branch for branch in filt_branch.branch_set.branches)
+
+
+def test_reassigned_view_round_trip(full_slt):
+    views = [fb for fb in full_slt if fb.branch_set.short_name == "PUY"]
+    original_weights = [branch.weight for branch in full_slt.branch_sets[0].branches]
+    for view in views:
+        view.weight = 1 / 3
+    assert views[1].to_branch() is not full_slt.branch_sets[0].branches[1]
+
+    puy = SourceLogicTree.from_branches(views)
+    assert [branch.weight for branch in puy.branch_sets[0].branches] == [1 / 3] * 3
+    assert [branch.branch_id for branch in puy.branch_sets[0].branches] == [view.branch_id for view in views]
+    assert [branch.weight for branch in full_slt.branch_sets[0].branches] == original_weights
+
+
+def branch_ids(slt):
+    return [(bs.short_name, branch.branch_id) for bs in slt.branch_sets for branch in bs.branches]
+
+
+def test_select_matches_filter_functions(full_slt):
+    expected = SourceLogicTree.from_branches(fb for fb in full_slt if unscaled_filter(fb) and geodetic_filter(fb))
+    selected = full_slt.select(dm="geodetic", s=1.0)
+    assert branch_ids(selected) == branch_ids(expected)
+    assert len(list(selected)) == 6
+    assert type(selected) is SourceLogicTree
+
+
+def test_select_branch_sets(full_slt):
+    selected = full_slt.select(branch_sets=["CRU"], s={0.66, 1.0})
+    assert [bs.short_name for bs in selected.branch_sets] == ["CRU"]
+    assert {v.value for fb in selected for v in fb.values if v.name == "s"} == {0.66, 1.0}
+
+    assert branch_ids(full_slt.select(branch_sets=["HIK", "PUY"])) == branch_ids(
+        SourceLogicTree.from_branches(fb for fb in full_slt if fb.branch_set.short_name in ("HIK", "PUY"))
+    )
+    assert len(full_slt.select(branch_sets=["PUY", "HIK"]).correlations) == 9
+
+    with pytest.raises(ValueError):
+        full_slt.select(branch_sets=["XYZ"])
+
+
+def test_select_list_values(full_slt):
+    selected = full_slt.select(bN=[0.823, 2.7])
+    assert len(list(selected)) > 0
+    assert all(v.value == [0.823, 2.7] for fb in selected for v in fb.values if v.name == "bN")
+    assert len(list(full_slt.select(dm="no such deformation model"))) == 0
@@ -48,3 +48,28 @@ def test_source_logic_tree_v2_iterable_size(slt_version_2):
 
 def test_source_logic_tree_v2_iterates_source_logic_tree(slt_version_2):
     assert next(iter(slt_version_2)).sources[0] == slt_version_2.branch_sets[0].branches[0].sources[0]
+
+
+def test_source_logic_tree_nested_iteration(current_model):
+    slt = current_model.source_logic_tree
+    n_branches = sum(len(branch_set.branches) for branch_set in slt.branch_sets)
+
+    # iterators are independent of each other
+    pairs = [(outer.branch_id, inner.branch_id) for outer in slt for inner in slt]
+    assert len(pairs) == n_branches**2
+
+    branch_set = slt.branch_sets[0]
+    assert [(a, b) for a in branch_set for b in branch_set] == [
+        (a, b) for a in branch_set.branches for b in branch_set.branches
+    ]
+
+    composite_branch = next(iter(slt.composite_branches))
+    assert [(a, b) for a in composite_branch for b in composite_branch] == [
+        (a, b) for a in composite_branch.branches for b in composite_branch.branches
+    ]
+
+
+def test_source_logic_tree_iteration_is_lazy(current_model):
+    iterator = iter(current_model.source_logic_tree)
+    assert not isinstance(iterator, SourceLogicTree)
+    assert isinstance(next(iterator), SourceBranch)
@@ -0,0 +1,133 @@
+"""
+test binary snapshots of logic trees and models
+"""
+
+import pytest
+
+import nzshm_model.model
+from nzshm_model import NshmModel, all_model_versions
+from nzshm_model.logic_tree import GMCMLogicTree, SourceLogicTree
+from nzshm_model.snapshot import FORMAT_VERSION, SnapshotError, SnapshotReader, SnapshotWriter
+
+
+def test_values_round_trip():
+    values = [None, True, False, 0, 1, -(2**63), 1.0, 0.1, float('inf'), '', 'ā', [0.902, 4.6], (1, 'a'), {'a': [1]}]
+    writer = SnapshotWriter('values')
+    indices = [writer.value(value) for value in values]
+    reader = SnapshotReader(writer.to_bytes(), 'values')
+    decoded = [reader.value(index) for index in indices]
+
+    assert decoded == values
+    assert [type(value) for value in decoded] == [type(value) for value in values]
+    # containers are not shared
+    assert reader.value(indices[-1]) is not reader.value(indices[-1])
+
+    with pytest.raises(TypeError):
+        writer.value({1, 2})
+    with pytest.raises(TypeError):
+        writer.value(2**63)
+
+
+def test_arrays_round_trip():
+    writer = SnapshotWriter('arrays')
+    writer.array('weights', [0.25, 0.75], float)
+    writer.index_lists('lists', [[1, 2], [], [3]])
+    writer.blob('blob', b'\x00bytes')
+    reader = SnapshotReader(writer.to_bytes(), 'arrays')
+
+    assert reader.array('weights').tolist() == [0.25, 0.75]
+    assert reader.index_lists('lists') == [[1, 2], [], [3]]
+    assert reader.blob('blob') == b'\x00bytes'
+    with pytest.raises(SnapshotError):
+        reader.array('missing')
+    with pytest.raises(ValueError):
+        writer.array('weights', [], float)
+
+
+def test_snapshot_errors():
+    data = SnapshotWriter('kind').to_bytes()
+    with pytest.raises(SnapshotError, match="not a snapshot"):
+        SnapshotReader(b'{"title": ""}', 'kind')
+    with pytest.raises(SnapshotError, match="other"):
+        SnapshotReader(data, 'other')
+    with pytest.raises(SnapshotError, match="integrity"):
+        SnapshotReader(data[:-1] + bytes([data[-1] ^ 1]), 'kind')
+    with pytest.raises(SnapshotError, match="format version"):
+        SnapshotReader(data[:8] + b'\xff\xff' + data[10:], 'kind')
+
+
+def test_logic_trees_round_trip(current_model):
+    for logic_tree in (current_model.source_logic_tree, current_model.gmm_logic_tree):
+        data = logic_tree.to_snapshot()
+        loaded = type(logic_tree).from_snapshot(data)
+
+        assert loaded == logic_tree
+        assert loaded.to_dict() == logic_tree.to_dict()
+        assert getattr(loaded, 'logic_tree_version', None) == getattr(logic_tree, 'logic_tree_version', None)
+        assert list(loaded.composite_branches) == list(logic_tree.composite_branches)
+        assert loaded.to_snapshot() == data
+
+    with pytest.raises(SnapshotError):
+        GMCMLogicTree.from_snapshot(current_model.source_logic_tree.to_snapshot())
+
+    source_logic_tree = SourceLogicTree(title='no version', version='1', logic_tree_version=None)
+    assert SourceLogicTree.from_snapshot(source_logic_tree.to_snapshot()).logic_tree_version is None
+
+
+def test_logic_tree_snapshot_keeps_validation(current_model):
+    slt = current_model.source_logic_tree.select(dm="geodetic", s=1.0)
+    loaded = SourceLogicTree.from_snapshot(slt.to_snapshot())
+
+    assert loaded._validation == 'off'
+    assert loaded.composite_space().total_weight() < 1.0
+    assert list(loaded.composite_branches) == list(slt.composite_branches)
+
+
+def test_source_records_shared(current_model):
+    slt = SourceLogicTree.from_snapshot(current_model.source_logic_tree.to_snapshot())
+    records = [record for branch in slt for record in (*branch.values, *branch.sources)]
+    assert len({id(record) for record in records}) == len({(type(r), repr(r.__getstate__())) for r in records})
+
+
+@pytest.mark.parametrize("version", all_model_versions())
+def test_packaged_snapshots_are_current(version):
+    model = NshmModel.get_model_version(version)
+    model_from_files = NshmModel.from_files(**NshmModel._model_version_args(version))
+
+    assert (nzshm_model.model.SNAPSHOT_PATH / f"{version}.snapshot").read_bytes() == NshmModel.version_snapshot(version)
+    assert model.version == model_from_files.version
+    assert model.title == model_from_files.title
+    assert model.source_logic_tree == model_from_files.source_logic_tree
+    assert model.gmm_logic_tree == model_from_files.gmm_logic_tree
+    assert model.hazard_config.to_dict() == model_from_files.hazard_config.to_dict()
+
+
+def test_stale_snapshot_not_used(current_version, monkeypatch, tmp_path):
+    data = NshmModel.version_snapshot(current_version)
+    with pytest.raises(SnapshotError, match="other resource files"):
+        NshmModel.from_snapshot(data, resource_digests={})
+
+    (tmp_path / f"{current_version}.snapshot").write_bytes(
+        NshmModel.get_model_version(current_version).to_snapshot(resource_digests={})
+    )
+    monkeypatch.setattr(nzshm_model.model, 'SNAPSHOT_PATH', tmp_path)
+    NshmModel.clear_cache()
+    with pytest.warns(UserWarning, match="not the snapshot"):
+        model = NshmModel.get_model_version(current_version)
+    assert model.version == current_version
+
+
+def test_other_format_not_used(current_version, monkeypatch, tmp_path):
+    # a snapshot of another format version, whose arrays may differ
+    data = bytearray(NshmModel.version_snapshot(current_version))
+    data[8:10] = (FORMAT_VERSION + 1).to_bytes(2, 'little')
+    with pytest.raises(SnapshotError, match=f"format version {FORMAT_VERSION + 1} is not supported"):
+        NshmModel.manifest_from_snapshot(bytes(data))
+
+    (tmp_path / f"{current_version}.snapshot").write_bytes(data)
+    monkeypatch.setattr(nzshm_model.model, 'SNAPSHOT_PATH', tmp_path)
+    NshmModel.clear_cache()
+    with pytest.warns(UserWarning, match=f"format version {FORMAT_VERSION + 1}"):
+        manifest = NshmModel.get_model_manifest(current_version)
+    assert manifest == NshmModel.get_model_version(current_version).manifest(manifest.resource_digests)
+    NshmModel.clear_cache()